@@ -3,20 +3,21 @@ app/cli/conversation_loop.py
 """
 
 # Imports from modular voice pipeline
+from app.services.model_bundle import resolve_whisper  # first: may set HF_HUB_OFFLINE
 from app.ui.intake_form import run_intake_form
 from app.services.call_service import start_call, end_call, set_intent, log_turn, was_resolved, call_notes
 from app.services.rx_refills import match_medication, handle_refill_request
 from app.voice.synthesizer import stop_speaking, EdgeTTSPlayer
 from app.voice.transcriber import start_microphone, listen_and_transcribe_whisper
 from app.voice.llm import query_ollama, add_to_history, main_system_prompt, info_system_prompt, human_system_prompt, reason_system_prompt
+from app.voice.stt_profiles import PROFILES
 from faster_whisper import WhisperModel
-from classifiers.intent_model.intent_classifier import classify_intent
-from classifiers.appt_context_model.appt_context_classifier import classify_appt_context
-from classifiers.confirmation_model.confirmation_classifier import classify_confirmation
+from classifiers.backends import classify_intent, classify_appt_context, classify_confirmation
 from datetime import date
 import app.services.appointments as ap
 import time
 import json
+import os
 
 # ---------------------------
 # EdgeTTS main loop
@@ -31,9 +32,12 @@ def main_edge():
     
     print(f"Starting ClinAI agent for patient: {patient.first_name} {patient.last_name}")
     
-    # Load Whisper model for STT (speech-to-text)
+    # Load Whisper model for STT (speech-to-text); STT_CLI_PROFILE picks model + decode settings
     print("Loading Whisper model...")
-    whisper_model = WhisperModel("large-v3", device="cuda", compute_type="float16")
+    stt_profile = PROFILES[os.getenv("STT_CLI_PROFILE", "cli")]
+    whisper_model = WhisperModel(
+        resolve_whisper(stt_profile.model_size), device=stt_profile.device, compute_type=stt_profile.compute_type
+    )
     # Store running conversation so the LLM has context
     chat_history = [{"role": "system", "content": main_system_prompt},
                     {"role": "system", "content": info_system_prompt}] # pre-load system prompts to context window
@@ -95,9 +99,11 @@ def main_edge():
             q, stream = start_microphone()
             # set confidence threshold much lower when a drug name is being transcribed
             if refill_state == "drug_name":
-                user_input = listen_and_transcribe_whisper(whisper_model, q, response, min_conf=-2.0)
+                user_input = listen_and_transcribe_whisper(whisper_model, q, response, min_conf=-2.0,
+                                                           decode_options=stt_profile.decode_options())
             else:
-                user_input = listen_and_transcribe_whisper(whisper_model, q, response)
+                user_input = listen_and_transcribe_whisper(whisper_model, q, response,
+                                                           decode_options=stt_profile.decode_options())
             
             print(f"[DEBUG] user_input={user_input!r}")
             # Stop and close mic stream after transcribing
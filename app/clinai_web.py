@@ -8,52 +8,87 @@ This module contains the core functionalities and routing for ClinaAI.
 
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
 import uuid
-from typing import Dict, Optional, List
-from datetime import date
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, List
+from datetime import date, timedelta
 
 import pathlib
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
 import base64
-import io
-import edge_tts
-import tempfile
 import os
-import shutil
-from faster_whisper import WhisperModel
 
-import subprocess
-# Server-only: expect ffmpeg to be installed on the container and available on PATH.
-FFMPEG_BIN = os.getenv("FFMPEG_BIN") or shutil.which("ffmpeg") # for converting web audio -> WAV format
-
-if not FFMPEG_BIN: # raise error if ffmpeg not found
-    raise RuntimeError(
-        "ffmpeg not found. Install it on the server (e.g., Nixpacks aptPkgs=['ffmpeg']) "
-        "or set the FFMPEG_BIN environment variable to the ffmpeg path."
-    )
+# for converting web audio -> 16k mono float32 (raises at import if ffmpeg is missing)
+from app.voice.audio_decode import decode_to_float32, AudioDecodeError
+from app.voice.stt_service import (STT_POOL, STTBusyError, transcribe_with_gate, stt_batching_stats,
+    pool_for, stt_pool_stats)
+from app.voice.stt_profiles import (STT_ADAPTIVE, STT_DRUG_HOTWORDS, PROFILES, STTProfile, choose_profile,
+    profile_stats)
+from app.voice.streaming_stt import StreamingRecognizer
+from app.voice.vad import VAD_TRIMMER, vad_stats
 
 # ---- Imports from your existing app ----
 from app.services.call_service import (start_call,end_call,set_intent,log_turn,
-    was_resolved,call_notes,)
+    was_resolved,call_notes_async,)
 from app.services.patient_service import intake_patient, get_by_phone
 from app.services.rx_refills import match_medication, handle_refill_request, MEDS
+from app.services.turn_engine import TurnEngine
+from app.services.model_registry import ModelRegistry
+from app.voice.web_tts import (EDGE_TTS_VOICE, EDGE_TTS_VOICE_INTRO, EDGE_TTS_FAKE_REP_VOICE,
+    Segment, voice_segments, synthesize_segments, stream_segments, prewarm_tts, tts_cache_stats,
+    SentenceChunker, stream_sentences)
+from app.voice.tts_templates import (TTS_TEMPLATE_MODE, COMMON_SENTENCES, template_prewarm_texts,
+    template_stats)
+from app.voice.llm_health import OLLAMA_HEALTH, llm_health_stats
+from app.voice.chat_history import ChatHistory, chat_history_stats
 from app.voice.llm import (query_llm, add_to_history, main_system_prompt, info_system_prompt,
-    human_system_prompt, reason_system_prompt)
-from classifiers.intent_model.intent_classifier import classify_intent
-from classifiers.appt_context_model.appt_context_classifier import classify_appt_context
-from classifiers.confirmation_model.confirmation_classifier import classify_confirmation
+    human_system_prompt, reason_system_prompt, warm_ollama, llm_prefix_stats)
+from classifiers.backends import (classify_intent, classify_appt_context, classify_confirmation,
+    classifier_stats)
+from classifiers import backends as classifier_backends
 import app.services.appointments as ap
 
 # ---------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------
 
-app = FastAPI(title="ClinAI Web Demo")
+TTS_PREWARM = os.getenv("TTS_PREWARM", "true").lower() in ("1", "true", "yes", "y")
+# template mode: also prewarm slot values (dates for TTS_PREWARM_DAYS, every time, meds).
+# Off by default: hundreds of clips per worker, most never played; they cache on first use
+TTS_PREWARM_SLOTS = os.getenv("TTS_PREWARM_SLOTS", "false").lower() in ("1", "true", "yes", "y")
+TTS_PREWARM_DAYS = int(os.getenv("TTS_PREWARM_DAYS", "7"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: fill the TTS cache in the background so the server can take calls right away
+    background = []
+    if TTS_PREWARM:
+        background.append(asyncio.create_task(prewarm_tts(static_prompt_segments())))
+    # Whisper + classifiers load and warm up in parallel; /readyz flips once they're all done
+    # (the Ollama warm-up runs alongside but doesn't hold readiness back)
+    MODEL_REGISTRY.start()
+    # first Ollama probe off the event loop; later ones run on the monitor's own thread
+    await asyncio.to_thread(OLLAMA_HEALTH.start)
+    yield
+    # Shutdown
+    for task in background:
+        task.cancel()
+    MODEL_REGISTRY.shutdown()
+    OLLAMA_HEALTH.stop()
+    TURN_ENGINE.shutdown()
+    classifier_backends.shutdown()
+
+
+app = FastAPI(title="ClinAI Web Demo", lifespan=lifespan)
 
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 
@@ -65,84 +100,26 @@ async def root():
     # Serve the main HTML page
     return FileResponse(BASE_DIR / "static" / "index.html")
 
-# ----- TTS config -----
-EDGE_TTS_VOICE = "en-US-AvaNeural"
-EDGE_TTS_VOICE_INTRO = "en-US-RogerNeural"
-EDGE_TTS_FAKE_REP_VOICE = "en-AU-WilliamMultilingualNeural"
-FAKE_REP_TRIGGER = "Hi, this is William"
-EDGE_TTS_RATE = "+15%"
-
-async def tts_to_mp3_bytes(text: str, voice: str) -> bytes:
-    """
-    Use Edge TTS to synthesize `text` into MP3 bytes (in-memory),
-    without playing locally.
-    """
-    mp3_fp = io.BytesIO()
-    communicate = edge_tts.Communicate(
-        text,
-        voice=voice,
-        rate=EDGE_TTS_RATE,
+# ----- Model loading (Whisper STT for browser audio + turn classifiers) -----
+
+MODEL_REGISTRY = ModelRegistry(max_workers=int(os.getenv("MODEL_LOAD_WORKERS", "4")))
+# CTranslate2 starts its replica threads at load, so Whisper always loads in the worker
+MODEL_REGISTRY.register("whisper", STT_POOL.load, STT_POOL.warmup, fork_safe=False)
+_accurate_pool = pool_for(PROFILES["accurate"])  # drug-name tier
+if STT_ADAPTIVE and _accurate_pool is not STT_POOL:
+    # only when STT_ACCURATE_MODEL asks for a second model (opt-in: it costs its own RAM)
+    MODEL_REGISTRY.register("whisper_accurate", _accurate_pool.load, _accurate_pool.warmup, fork_safe=False)
+for _task in classifier_backends.TASKS:
+    MODEL_REGISTRY.register(
+        f"classifier_{_task}",
+        lambda task=_task: classifier_backends.load_task(task),
+        lambda task=_task: classifier_backends.warmup_task(task),
     )
-
-    async for chunk in communicate.stream():
-        if chunk["type"] == "audio":
-            mp3_fp.write(chunk["data"])
-
-    mp3_fp.seek(0)
-    return mp3_fp.read()
-
-# ----- Whisper STT for browser audio -----
-
-print("[ClinAI-Web] Loading Whisper model...")
-WHISPER_MODEL = WhisperModel("base", device="cpu", compute_type="int8")
-
-
-def _seg_conf(seg):
-    # prefer avg_logprob / avg_log_prob
-    return getattr(seg, "avg_logprob", getattr(seg, "avg_log_prob", -10.0))
-
-# return avg confidence score for transcribed text
-def _avg_conf_and_text(segments):
-    segs = list(segments)
-    if not segs:
-        return -10.0, ""
-    text = " ".join(s.text.strip() for s in segs).strip()
-    conf = sum(_seg_conf(s) for s in segs) / max(len(segs), 1)
-    return conf, text
-
-# Run Whisper on a WAV file and apply confidence gating logic
-def transcribe_file_with_gate(path: str, min_conf: float = -0.70) -> str:
-    try:
-        # transcribe speech
-        segments_iter, _ = WHISPER_MODEL.transcribe(
-            path,
-            language="en",
-            beam_size=1,
-            word_timestamps=False,
-        )
-        segments = list(segments_iter)
-    except Exception as e:
-        print("[STT] Whisper error in web app:", e)
-        return ""
-
-    avg_conf, text = _avg_conf_and_text(segments)
-    if not text:
-        return ""
-
-    # adjust confidence score for prompts with less words
-    word_count = len(text.split())
-    if word_count < 3:
-        adj_conf = avg_conf + 0.40
-    elif word_count == 3:
-        adj_conf = avg_conf + 0.35
-    else:
-        adj_conf = avg_conf
-
-    print(f"[STT] text={text!r} avg_conf={avg_conf:.2f} adj_conf={adj_conf:.2f}")
-    # return inaudible note if conf threshold not met
-    if adj_conf < min_conf:
-        return "[Inaudible Message]"
-    return text
+# Ollama: loads the model and evaluates the shared prompt prefix once (see warm_ollama).
+# Not required for /readyz: with Ollama down, calls are answered through OpenAI.
+MODEL_REGISTRY.register(
+    "ollama", lambda: warm_ollama(LLM_MODEL, llm_prefix()), fork_safe=False, required=False
+)
 
 # ---------------------------------------------------
 # Session models for API
@@ -173,24 +150,178 @@ class TurnResponse(BaseModel):
     # For voice mode: what the STT heard from user
     user_transcript: Optional[str] = None
 
+# ---------------------------------------------------
+# Fixed agent lines (also prewarmed into the TTS cache at startup)
+# ---------------------------------------------------
+
+INTRO_MSG = (
+    "Your conversation may be monitored or recorded. "
+    "You can say 'stop' or 'quit' at any time to exit the conversation."
+)
+GOODBYE_MSG = "Your feedback is appreciated. Goodbye!"
+REPEAT_MSG = "Sorry, I didn’t catch that clearly. Could you repeat?"
+STILL_THERE_MSG = "Are you still there?"
+ESCALATION_MSG = "Please hold while I transfer you to a human representative..."
+FAKE_REP_MSG = (
+    "Hi, this is William with Sunrise Family Medicine. "
+    "How can I help you today?"
+)
+CANCELLED_FOR_RESCHEDULE_MSG = (
+    "Your appointment has been cancelled. Please state a date and time "
+    "for your new appointment."
+)
+CANCELLED_MSG = (
+    "Your appointment has been cancelled. If you'd like to make another "
+    "appointment or request, just ask! If you'd like to end the call now, say stop."
+)
+KEEP_APPT_MSG = (
+    "No problem, we won't cancel that appointment. Let me know if you need "
+    "anything else or say 'stop' to end the call."
+)
+ANOTHER_DAY_MSG = "Please state another day you would like to schedule your appointment for... Or if you'd like to stop scheduling, just say so!"
+RETRY_DATE_TIME_MSG = (
+    "Sorry if I misheard you. Please try stating your date and time again in one "
+    "sentence or you may exit the scheduling process by telling me so."
+)
+EXIT_REFILL_MSG = (
+    "Got it, we will stop the refill process. If you'd like help with anything else, "
+    "just ask! If you'd like to exit the call, say stop."
+)
+EXIT_SCHEDULING_MSG = (
+    "Got it, we will stop the scheduling process. If you'd like help with anything else, "
+    "just ask! If you'd like to exit the call, say stop."
+)
+EXIT_CANCELLATION_MSG = (
+    "Got it, we will stop the cancellation process. If you'd like help with anything else, "
+    "just ask! If you'd like to exit the call, say stop."
+)
+EXIT_PROCESS_MSG = (
+    "Got it, we will stop this process. If you'd like help with anything else, "
+    "just ask! If you'd like to exit the call, say stop."
+)
+RETRY_MED_MSG = (
+    "Sorry if I misheard you. Please try saying the name of the "
+    "medication again, or if you'd like to exit the refill process, just say so!"
+)
+ASK_REASON_MSG = "Perfect! And what is the reason for your appointment?"
+APPT_BOOKED_MSG = (
+    "Got it! Your appointment has been registered into our system. "
+    "If you'd like to make another appointment or request, just ask! "
+    "If you'd like to end the call now, say stop."
+)
+RESCHEDULE_PREFIX = "Okay, let's reschedule for you!"
+ASK_DATE_TIME_MSG = "What date and time would you like to schedule for?"
+NO_APPTS_MSG = (
+    "Our database is showing that you do not have any scheduled appointments "
+    "at this time. If you would like to make a new one, just ask!"
+)
+ASK_MED_MSG = "Please exclusively name the medication you would like to refill."
+UNSUPPORTED_MED_MSG = (
+    f"I'm sorry, I didn't catch the name of the medication."
+    f" Please note that we currently only support {', '.join(MEDS[0:-1])} and {MEDS[-1]}."
+    f" Try exclusively naming the medication again if it's supported."
+)
+
+# ----- Refill re-prompt counters (/metrics) -----
+# A re-prompt is a drug-name turn that has to ask for the medication again: the name
+# didn't match the formulary, or the caller rejected the name we heard. Compare runs with
+# STT_DRUG_HOTWORDS on/off to see how many turns the vocabulary biasing saves.
+# A rejection always follows a matched turn, so reprompt_rate stays within 0..1.
+_refill_lock = threading.Lock()
+REFILL_STATS = {"drug_name_turns": 0, "names_unmatched": 0, "names_matched": 0, "names_rejected": 0}
+
+
+def _count_refill(*keys: str) -> None:
+    with _refill_lock:
+        for key in keys:
+            REFILL_STATS[key] += 1
+
+
+def refill_stats() -> Dict[str, object]:
+    with _refill_lock:
+        stats = dict(REFILL_STATS)
+    turns = stats["drug_name_turns"]
+    stats["reprompts"] = stats["names_unmatched"] + stats["names_rejected"]
+    stats["reprompt_rate"] = round(stats["reprompts"] / turns, 3) if turns else 0.0
+    stats["drug_hotwords"] = STT_DRUG_HOTWORDS
+    return stats
+
+# Lines spoken by Ava (or William once the call is escalated, see REP_STATIC_PROMPTS)
+AGENT_STATIC_PROMPTS = [
+    GOODBYE_MSG, REPEAT_MSG, STILL_THERE_MSG, CANCELLED_FOR_RESCHEDULE_MSG, CANCELLED_MSG,
+    KEEP_APPT_MSG, ANOTHER_DAY_MSG, RETRY_DATE_TIME_MSG, EXIT_REFILL_MSG, EXIT_SCHEDULING_MSG,
+    EXIT_CANCELLATION_MSG, EXIT_PROCESS_MSG, RETRY_MED_MSG, ASK_REASON_MSG, APPT_BOOKED_MSG,
+    RESCHEDULE_PREFIX, ASK_DATE_TIME_MSG, NO_APPTS_MSG, ASK_MED_MSG, UNSUPPORTED_MED_MSG,
+]
+# Few calls escalate: William is only prewarmed for the lines any escalated call can end
+# with; the rest are synthesized (and cached) the first time he says them
+REP_STATIC_PROMPTS = [GOODBYE_MSG, REPEAT_MSG, STILL_THERE_MSG]
+
+
+def _template_slot_values(days_ahead: int = TTS_PREWARM_DAYS) -> Dict[str, List[str]]:
+    # Known values for the template slots: upcoming dates, every time slot, supported meds
+    today = date.today()
+    dates = [ap.prettify_date((today + timedelta(days=n)).isoformat()) for n in range(days_ahead)]
+    times = []
+    for slot in ap.TIME_SLOTS:
+        for shown in (slot, ap.format_appt_time(slot)):
+            times += [shown, ap.add_ampm(shown)]
+    times = list(dict.fromkeys(times))
+    return {
+        "date": dates,
+        "time": times,
+        "at_time": [f"at {t}" for t in times],
+        "med": list(MEDS),
+    }
+
+
+def static_prompt_segments() -> List[Segment]:
+    # Every fixed line in the voice it will actually be read in
+    agent_texts = AGENT_STATIC_PROMPTS + COMMON_SENTENCES
+    if TTS_TEMPLATE_MODE:
+        # fixed template pieces always; slot values only when asked for
+        slot_values = _template_slot_values() if TTS_PREWARM_SLOTS else {}
+        agent_texts = agent_texts + template_prewarm_texts(slot_values)
+
+    segments: List[Segment] = [(INTRO_MSG, EDGE_TTS_VOICE_INTRO)]
+    segments += voice_segments(f"{ESCALATION_MSG} {FAKE_REP_MSG}", rep_mode=True)
+    segments += [(text, EDGE_TTS_VOICE) for text in agent_texts]
+    segments += [(text, EDGE_TTS_FAKE_REP_VOICE) for text in REP_STATIC_PROMPTS]
+    return segments
+
 # ---------------------------------------------------
 # Core stateful session (port of main loop)
 # ---------------------------------------------------
 
+LLM_MODEL = "llama3.1:8b"
+
+def llm_prefix() -> List[Dict[str, str]]:
+    # the pinned system messages every session's LLM context starts with (see ClinAISession.start)
+    return [
+        {"role": "system", "content": main_system_prompt},
+        {"role": "system", "content": info_system_prompt},
+        {"role": "system", "content": INTRO_MSG},
+    ]
+
 class ClinAISession:
 
-    _sch = ap.start_scheduler() # Update status of appointments that already happened
+    # Update status of appointments that already happened. APPT_SWEEPER=false leaves it to
+    # someone else: app/server.py runs exactly one, in worker 0
+    _sch = (
+        ap.start_scheduler()
+        if os.getenv("APPT_SWEEPER", "true").lower() in ("1", "true", "yes", "y")
+        else None
+    )
     
     def __init__(self, patient, call):
         self.patient = patient
         self.call = call
 
         # LLM + chat context
-        self.llm_model = "llama3.1:8b"
-        self.chat_history = [
-            {"role": "system", "content": main_system_prompt},
-            {"role": "system", "content": info_system_prompt},
-        ]
+        self.llm_model = LLM_MODEL
+        self.on_token: Optional[Callable[[str], None]] = None  # set for the duration of a streamed turn
+        # pinned system prompts + token-budgeted turns (chat_history.py); start() adds the intro
+        self.chat_history = ChatHistory(llm_prefix()[:2], self.llm_model)
 
         # appointment + refill state
         self.temp_appt_date = ap.new_temp_appt_date()
@@ -215,28 +346,26 @@ class ClinAISession:
 
     def start(self) -> List[Dict[str, str]]:
         # Called once after session is created. Returns intro + welcome messages.
-        intro_msg = (
-            "Your conversation may be monitored or recorded. "
-            "You can say 'stop' or 'quit' at any time to exit the conversation."
-        )
+        intro_msg = INTRO_MSG
         add_to_history(self.chat_history, "system", intro_msg)
         log_turn(self.call.id, "assistant", intro_msg)
 
         welcome_msg = f"Hi {self.patient.first_name}, I'm Ava. How can I assist you today?"
         add_to_history(self.chat_history, "assistant", welcome_msg)
         log_turn(self.call.id, "assistant", welcome_msg)
+        # the greeting carries the patient's name: keep it in the pinned block
+        self.chat_history.pin()
 
         return [
             {"role": "assistant", "content": intro_msg},
             {"role": "assistant", "content": welcome_msg},
         ]
 
-    def end(self):
-        # Wrap up call in DB, including summary notes + intents
+    def end(self, notes: Optional[str] = None):
+        # Wrap up call in DB, including summary notes (see _finish_session) + intents
         intents_json = json.dumps(self.patient_intents)
         set_intent(self.call.id, intents_json)
 
-        notes = call_notes(self.chat_history[:], self.llm_model)  # pass a copy
         end_call(
             self.call.id,
             resolved=self.resolved if self.resolved is not None else False,
@@ -246,27 +375,36 @@ class ClinAISession:
 
     # ---------- main turn handler ----------
 
-    def handle_turn(self, user_input: str) -> Dict[str, object]:
+    def handle_turn(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, object]:
         """
         Single conversational turn
 
+        on_token (streaming endpoints) receives the spoken part of LLM-generated replies
+        token by token while they are generated; the return value is the same either way.
+
         Returns:
             {"agent_message": str, "end_call": bool}
         """
+        self.on_token = on_token
+        try:
+            return self._handle_turn(user_input)
+        finally:
+            self.on_token = None
 
+    def _handle_turn(self, user_input: str) -> Dict[str, object]:
         user_input = (user_input or "").strip()
 
         # If in the feedback phase, interpret this as resolved/not resolved.
         if self.awaiting_feedback:
             self.resolved = was_resolved(user_input)
-            goodbye_msg = "Your feedback is appreciated. Goodbye!"
+            goodbye_msg = GOODBYE_MSG
             add_to_history(self.chat_history, "assistant", goodbye_msg)
             log_turn(self.call.id, "assistant", goodbye_msg)
             return {"agent_message": goodbye_msg, "end_call": True}
 
         # Handle empty input if browser sent empty message
         if not user_input:
-            repeat_msg = "Sorry, I didn’t catch that clearly. Could you repeat?"
+            repeat_msg = REPEAT_MSG
             add_to_history(self.chat_history, "assistant", repeat_msg)
             log_turn(self.call.id, "assistant", repeat_msg)
             return {"agent_message": repeat_msg, "end_call": False}
@@ -325,19 +463,15 @@ class ClinAISession:
         if intent == "HUMAN_AGENT" and not self.escalated:
             self.escalated = True
 
-            escalation_msg = "Please hold while I transfer you to a human representative..."
+            escalation_msg = ESCALATION_MSG
             add_to_history(self.chat_history, "assistant", escalation_msg)
             log_turn(self.call.id, "assistant", escalation_msg)
 
             # swap system prompt to human version
-            # remove first system prompt, then add new one
-            self.chat_history.pop(0)
-            add_to_history(self.chat_history, "system", human_system_prompt)
+            # in place, so it stays in the pinned prefix
+            self.chat_history[0] = {"role": "system", "content": human_system_prompt}
 
-            fake_rep_msg = (
-                "Hi, this is William with Sunrise Family Medicine. "
-                "How can I help you today?"
-            )
+            fake_rep_msg = FAKE_REP_MSG
             add_to_history(self.chat_history, "assistant", fake_rep_msg)
             log_turn(self.call.id, "assistant", fake_rep_msg)
 
@@ -353,8 +487,7 @@ class ClinAISession:
 
         # 2. ---------- ADMIN INFO ----------
         if intent == "ADMIN_INFO":
-            response = query_llm(user_input, self.chat_history, self.llm_model)
-            add_to_history(self.chat_history, "assistant", response)
+            response = query_llm(user_input, self.chat_history, self.llm_model, on_token=self.on_token)
             log_turn(self.call.id, "assistant", response)
 
             # reset pending_confirmation if we detoured
@@ -419,10 +552,7 @@ class ClinAISession:
                 ap.cancel_appointment(self.cancel_appt_id)
 
                 if self.reschedule_state == "cancel_for_rescheduling":
-                    msg = (
-                        "Your appointment has been cancelled. Please state a date and time "
-                        "for your new appointment."
-                    )
+                    msg = CANCELLED_FOR_RESCHEDULE_MSG
                     add_to_history(self.chat_history, "assistant", msg)
                     log_turn(self.call.id, "assistant", msg)
                     self.temp_appt_date = ap.new_temp_appt_date()
@@ -430,10 +560,7 @@ class ClinAISession:
                     self.reschedule_state = None
                     return {"agent_message": msg, "end_call": False}
 
-                msg = (
-                    "Your appointment has been cancelled. If you'd like to make another "
-                    "appointment or request, just ask! If you'd like to end the call now, say stop."
-                    )
+                msg = CANCELLED_MSG
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 self.temp_appt_date = ap.new_temp_appt_date()
@@ -451,10 +578,7 @@ class ClinAISession:
                 return {"agent_message": msg, "end_call": False}
 
             elif confirm_appt_cancellation == "REJECT":
-                msg = (
-                    "No problem, we won't cancel that appointment. Let me know if you need "
-                    "anything else or say 'stop' to end the call."
-                )
+                msg = KEEP_APPT_MSG
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 self.temp_appt_date = ap.new_temp_appt_date()
@@ -516,7 +640,7 @@ class ClinAISession:
                 
                 elif confirm_last_appt_time == "REJECT":
                     # no new date/time given
-                    msg = "Please state another day you would like to schedule your appointment for... Or if you'd like to stop scheduling, just say so!"
+                    msg = ANOTHER_DAY_MSG
                     add_to_history(self.chat_history, "assistant", msg)
                     log_turn(self.call.id, "assistant", msg)
                     self.temp_appt_date = ap.new_temp_appt_date()
@@ -566,10 +690,7 @@ class ClinAISession:
                     self.appt_state = "pending_confirmation"
                     return {"agent_message": msg, "end_call": False}
                 else:
-                    msg = (
-                        "Sorry if I misheard you. Please try stating your date and time again in one "
-                        "sentence or you may exit the scheduling process by telling me so."
-                    )
+                    msg = RETRY_DATE_TIME_MSG
                     add_to_history(self.chat_history, "assistant", msg)
                     log_turn(self.call.id, "assistant", msg)
                     self.temp_appt_date = ap.new_temp_appt_date()
@@ -593,25 +714,13 @@ class ClinAISession:
 
                 # custom exit message for each pipeline
                 if self.refill_state in ["drug_name", "confirm_drug_name"]:
-                    msg = (
-                        "Got it, we will stop the refill process. If you'd like help with anything else, "
-                        "just ask! If you'd like to exit the call, say stop."
-                    )
+                    msg = EXIT_REFILL_MSG
                 elif self.appt_state in ["pending_confirmation", "scheduling_appt", "appt_reason"]:
-                    msg = (
-                        "Got it, we will stop the scheduling process. If you'd like help with anything else, "
-                        "just ask! If you'd like to exit the call, say stop."
-                    )
+                    msg = EXIT_SCHEDULING_MSG
                 elif self.appt_state in ["awaiting_cancellation_date", "cancelling_appt"]:
-                    msg = (
-                        "Got it, we will stop the cancellation process. If you'd like help with anything else, "
-                        "just ask! If you'd like to exit the call, say stop."
-                    )
+                    msg = EXIT_CANCELLATION_MSG
                 else:    
-                    msg = (
-                        "Got it, we will stop this process. If you'd like help with anything else, "
-                        "just ask! If you'd like to exit the call, say stop."
-                    )
+                    msg = EXIT_PROCESS_MSG
                            
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
@@ -642,10 +751,8 @@ class ClinAISession:
                 return {"agent_message": msg, "end_call": False}
 
             elif confirm_drug_name == "REJECT":
-                msg = (
-                    "Sorry if I misheard you. Please try saying the name of the "
-                    "medication again, or if you'd like to exit the refill process, just say so!"
-                )
+                _count_refill("names_rejected")  # we heard the wrong medication
+                msg = RETRY_MED_MSG
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 self.refill_state = "drug_name"
@@ -653,7 +760,7 @@ class ClinAISession:
 
         # 9. ---------- ASK REASON ONCE APPT CONFIRMED ----------
         if not ap.missing_info_check(self.temp_appt_date) and self.appt_state == "appt_confirmed":
-            msg = "Perfect! And what is the reason for your appointment?"
+            msg = ASK_REASON_MSG
             add_to_history(self.chat_history, "assistant", msg)
             log_turn(self.call.id, "assistant", msg)
             self.appt_state = "appt_reason"
@@ -661,11 +768,7 @@ class ClinAISession:
 
         if self.appt_state == "appt_reason":
             appt_reason = user_input
-            msg = (
-                "Got it! Your appointment has been registered into our system. "
-                "If you'd like to make another appointment or request, just ask! "
-                "If you'd like to end the call now, say stop."
-            )
+            msg = APPT_BOOKED_MSG
             add_to_history(self.chat_history, "assistant", msg)
             log_turn(self.call.id, "assistant", msg)
 
@@ -687,7 +790,7 @@ class ClinAISession:
         
         if intent == "APPT_RESCHEDULE":
             # create prefix for next message from agent in cancellation pipeline
-            reschedule_prefix = "Okay, let's reschedule for you!"
+            reschedule_prefix = RESCHEDULE_PREFIX
             self.reschedule_state = "cancel_for_rescheduling"
             self.appt_state = "cancelling_appt" # sends user down to cancellation pipeline
         
@@ -728,7 +831,7 @@ class ClinAISession:
                 
             # missing date or time
             if None in blanks:
-                msg = "What date and time would you like to schedule for?"
+                msg = ASK_DATE_TIME_MSG
                 msg = prepend_multidate_msg(msg)
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
@@ -791,10 +894,11 @@ class ClinAISession:
                     prompt_for_availability = (
                         f"Please give me the available times for {self.temp_appt_date['date']}"
                     )
+                    if self.on_token:
+                        self.on_token(msg + " ")  # spoken while the LLM reads the slots
                     availabilities_response = query_llm(
-                        prompt_for_availability, self.chat_history, self.llm_model
+                        prompt_for_availability, self.chat_history, self.llm_model, on_token=self.on_token
                     )
-                    add_to_history(self.chat_history, "assistant", availabilities_response)
                     log_turn(self.call.id, "assistant", availabilities_response)
 
                     if len(available_appt_times) == 1: # if there's only one appt slot left
@@ -879,10 +983,7 @@ class ClinAISession:
                 return text
             
             if not patient_appts:
-                msg = (
-                    "Our database is showing that you do not have any scheduled appointments "
-                    "at this time. If you would like to make a new one, just ask!"
-                )
+                msg = NO_APPTS_MSG
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 self.appt_state = None
@@ -1015,7 +1116,7 @@ class ClinAISession:
                 return {"agent_message": msg, "end_call": False}
             
             else: # ask user to name medication
-                msg = "Please exclusively name the medication you would like to refill."
+                msg = ASK_MED_MSG
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 self.refill_state = "drug_name"
@@ -1024,14 +1125,14 @@ class ClinAISession:
         if self.refill_state == "drug_name":
             med = match_medication(user_input)
             if not med: # inform user list of supported meds
-                msg = (f"I'm sorry, I didn't catch the name of the medication." 
-                    f" Please note that we currently only support {', '.join(MEDS[0:-1])} and {MEDS[-1]}."
-                    f" Try exclusively naming the medication again if it's supported.")
-                
+                _count_refill("drug_name_turns", "names_unmatched")
+                msg = UNSUPPORTED_MED_MSG
+
                 add_to_history(self.chat_history, "assistant", msg)
                 log_turn(self.call.id, "assistant", msg)
                 return {"agent_message": msg, "end_call": False}
 
+            _count_refill("drug_name_turns", "names_matched")
             self.med = med
             msg = f"To confirm, you would like a refill for {med}?"
             add_to_history(self.chat_history, "assistant", msg)
@@ -1041,8 +1142,7 @@ class ClinAISession:
 
         # 14. ---------- FALLBACK: LLM ANSWER ----------
         # Typically if intent == ADMIN_INFO or intent == OTHER and state machines are None
-        response = query_llm(user_input, self.chat_history, self.llm_model)
-        add_to_history(self.chat_history, "assistant", response)
+        response = query_llm(user_input, self.chat_history, self.llm_model, on_token=self.on_token)
         log_turn(self.call.id, "assistant", response)
         return {"agent_message": response, "end_call": False}
 
@@ -1051,21 +1151,22 @@ class ClinAISession:
 
 sessions: Dict[str, ClinAISession] = {}
 
-# -------------------------------------------------------------------------
-# API endpoints
-# -------------------------------------------------------------------------
+# Blocking session work runs here so one caller can't stall the event loop for everyone else
+TURN_ENGINE = TurnEngine(max_workers=int(os.getenv("TURN_WORKERS", "8")))
 
-@app.post("/start_session", response_model=StartSessionResponse)
-async def start_session(req: StartSessionRequest):
-    """
-    Start a ClinAI web session.
 
-    - If only phone is provided: try to look up existing patient by phone.
-    - If found -> use that patient.
-    - If not found -> require full info (first_name, last_name, dob) and create via intake_patient.
-    - If full info is provided from the start, just call intake_patient (it will create or update).
-    """
+async def _finish_session(session_id: str, session: ClinAISession) -> None:
+    # Wrap up the call in the DB and drop the session; the notes LLM call is awaited
+    # directly, so only the DB writes take a worker thread
+    async with TURN_ENGINE.session(session_id):
+        notes = await call_notes_async(session.chat_history[:], session.llm_model)  # pass a copy
+        await TURN_ENGINE.submit(session.end, notes)
+    sessions.pop(session_id, None)
+    TURN_ENGINE.forget(session_id)
 
+
+# Resolve the caller to a patient row (blocking DB work, see start_session for the rules)
+def _lookup_or_intake_patient(req: StartSessionRequest):
     # ---------- Try returning-patient flow (phone only) ----------
     if not req.first_name and not req.last_name and not req.dob:
         patient = get_by_phone(req.phone)
@@ -1077,27 +1178,235 @@ async def start_session(req: StartSessionRequest):
                     "Please register by providing your name and date of birth."
                 ),
             )
+        return patient
+
     # ---------- Registration flow ----------
+    dob_val = None
+    if req.dob:
+        dob_val = date.fromisoformat(req.dob)
+
+    return intake_patient(
+        first_name=req.first_name,
+        last_name=req.last_name,
+        phone=req.phone,
+        dob=dob_val,
+    )
+
+# ---------------------------------------------------
+# Turn helpers shared by the JSON + streaming endpoints
+# ---------------------------------------------------
+
+async def _agent_audio_b64(agent_message: str, rep_mode: bool) -> Optional[str]:
+    mp3_bytes = await synthesize_segments(voice_segments(agent_message, rep_mode))
+    return base64.b64encode(mp3_bytes).decode("ascii") if mp3_bytes else None
+
+
+def _still_there_message(session: ClinAISession) -> str:
+    # Presence check when the upload had no speech in it
+    patient = getattr(session, "patient", None)
+    first_name = getattr(patient, "first_name", None)
+    if first_name:
+        return f"Are you still there, {first_name}?"
+    return STILL_THERE_MSG
+
+
+def _stt_min_conf(session: ClinAISession) -> float:
+    # looser threshold for drug names
+    return -2.0 if getattr(session, "refill_state", None) == "drug_name" else -0.70
+
+
+def _stt_profile(session: ClinAISession) -> STTProfile:
+    # What the agent is waiting for decides how hard Whisper should try
+    if getattr(session, "refill_state", None) == "drug_name":
+        context = "drug_name"
+    elif (
+        getattr(session, "awaiting_feedback", False)
+        or getattr(session, "refill_state", None) == "confirm_drug_name"
+        or getattr(session, "appt_state", None) in ("pending_confirmation", "confirm_cancellation")
+        or getattr(session, "availability_state", None) == "confirm_last_slot"
+    ):
+        context = "confirmation"  # yes/no answer
     else:
-        dob_val = None
-        if req.dob:
-            dob_val = date.fromisoformat(req.dob)
-
-        patient = intake_patient(
-            first_name=req.first_name,
-            last_name=req.last_name,
-            phone=req.phone,
-            dob=dob_val,
+        context = None
+    # degrade on the backlog of the pool the profile would actually run on
+    profile = choose_profile(context, queue_depth=lambda p: pool_for(p).waiting)
+    if context == "drug_name" and STT_DRUG_HOTWORDS:
+        profile = profile.with_vocabulary(MEDS, "Medications")
+    return profile
+
+
+async def _transcribe_upload(session: ClinAISession, audio: UploadFile) -> str:
+    # Decode WebM/Opus -> 16k mono float32 in memory (Faster-Whisper not compatible with WebM/Opus)
+    try:
+        samples = await decode_to_float32(await audio.read())
+    except AudioDecodeError as e:
+        print("[STT] ffmpeg stderr:", e)
+        raise HTTPException(
+            status_code=500,
+            detail="ffmpeg failed to convert audio",
         )
 
+    # trim leading/trailing silence; nothing left -> no speech, Whisper never runs
+    if VAD_TRIMMER is not None and samples.size:
+        samples = VAD_TRIMMER.trim(samples)
+
+    if samples.size == 0:
+        return ""
+
+    try:
+        text = await transcribe_with_gate(
+            samples, min_conf=_stt_min_conf(session), profile=_stt_profile(session)
+        )
+    except STTBusyError as e:
+        print(f"[STT] rejected: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Speech recognition is busy, please try again.",
+        )
+
+    # "[Inaudible Message]" (confidence threshold not met) is passed through: let the LLM handle it
+    return text
+
+
+def _sse(event: str, data) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _turn_event_stream(
+    session_id: str,
+    session: ClinAISession,
+    result: Dict[str, object],
+    user_transcript: Optional[str] = None,
+) -> StreamingResponse:
+    agent_message = result["agent_message"]
+    end_call_flag = bool(result.get("end_call", False))
+    rep_mode = getattr(session, "escalated", False)
+
+    async def events():
+        yield _sse("meta", {
+            "agent_message": agent_message,
+            "end_call": end_call_flag,
+            "user_transcript": user_transcript,
+        })
+        try:
+            async for chunk in stream_segments(voice_segments(agent_message, rep_mode)):
+                yield _sse("audio", base64.b64encode(chunk).decode("ascii"))
+        except Exception as e:
+            print(f"[WARN] TTS stream failed: {e}")
+        yield _sse("done", {})
+
+    # End the call once the reply has been streamed (runs even if the client hangs up)
+    background = BackgroundTask(_finish_session, session_id, session) if end_call_flag else None
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
+
+def _streamed_turn_response(
+    session_id: str,
+    session: ClinAISession,
+    user_input: str,
+    user_transcript: Optional[str] = None,
+) -> StreamingResponse:
+    # Runs the turn with LLM token streaming: sentences go to TTS (and out as audio) while
+    # later tokens are still being generated. Turns without an LLM reply stream as before.
+    loop = asyncio.get_running_loop()
+    sentences: asyncio.Queue = asyncio.Queue()
+    chunker = SentenceChunker()
+
+    def voice() -> str:
+        return EDGE_TTS_FAKE_REP_VOICE if session.escalated else EDGE_TTS_VOICE
+
+    def on_token(token: str) -> None:
+        # turn engine worker thread -> event loop
+        for sentence in chunker.feed(token):
+            loop.call_soon_threadsafe(sentences.put_nowait, (sentence, voice()))
+
+    def end_of_reply(_task) -> None:
+        for sentence in chunker.flush():
+            sentences.put_nowait((sentence, voice()))
+        sentences.put_nowait(None)
+
+    turn = asyncio.ensure_future(TURN_ENGINE.run(session_id, session.handle_turn, user_input, on_token))
+    turn.add_done_callback(end_of_reply)
+
+    async def events():
+        streamed = False
+        try:
+            async for kind, payload in stream_sentences(sentences):
+                if kind == "sentence":
+                    streamed = True
+                    yield _sse("sentence", {"text": payload})
+                else:
+                    yield _sse("audio", base64.b64encode(payload).decode("ascii"))
+            result = await turn
+        except Exception as e:
+            print(f"[WARN] Streamed turn failed: {e}")
+            yield _sse("error", {"detail": "Turn failed."})
+            yield _sse("done", {})
+            return
+
+        agent_message = result["agent_message"]
+        yield _sse("meta", {
+            "agent_message": agent_message,
+            "end_call": bool(result.get("end_call", False)),
+            "user_transcript": user_transcript,
+        })
+        if not streamed:
+            # no LLM reply this turn: whole message through the sentence planner
+            try:
+                async for chunk in stream_segments(voice_segments(agent_message, session.escalated)):
+                    yield _sse("audio", base64.b64encode(chunk).decode("ascii"))
+            except Exception as e:
+                print(f"[WARN] TTS stream failed: {e}")
+        yield _sse("done", {})
+
+    async def finish_if_ended() -> None:
+        # End the call once the reply has been streamed (runs even if the client hangs up)
+        try:
+            result = await turn
+        except Exception:
+            return
+        if result.get("end_call"):
+            await _finish_session(session_id, session)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(finish_if_ended),
+    )
+
+# -------------------------------------------------------------------------
+# API endpoints
+# -------------------------------------------------------------------------
+
+@app.post("/start_session", response_model=StartSessionResponse)
+async def start_session(req: StartSessionRequest):
+    """
+    Start a ClinAI web session.
+
+    - If only phone is provided: try to look up existing patient by phone.
+    - If found -> use that patient.
+    - If not found -> require full info (first_name, last_name, dob) and create via intake_patient.
+    - If full info is provided from the start, just call intake_patient (it will create or update).
+    """
+
+    patient = await TURN_ENGINE.submit(_lookup_or_intake_patient, req)
+
     # ---------- Start call + agent session ----------
-    call = start_call(patient_id=patient.id, from_number=patient.phone)
+    call = await TURN_ENGINE.submit(start_call, patient.id, patient.phone)
     session = ClinAISession(patient, call)
 
     session_id = str(uuid.uuid4())
     sessions[session_id] = session
 
-    messages = session.start()  # returns intro + welcome messages
+    # returns intro + welcome messages
+    messages = await TURN_ENGINE.run(session_id, session.start)
 
     # ---------- Build intro+welcome audio ----------
     '''
@@ -1107,27 +1416,22 @@ async def start_session(req: StartSessionRequest):
     {"role": "assistant", "content": welcome_msg},
     ]
     '''
-    audio_buf = io.BytesIO()
-
+    segments = []
     for idx, m in enumerate(messages):
         if m["role"] != "assistant":
             continue
-
-        text = m["content"]
         # First assistant message = monitoring notice -> Roger
         # Second assistant message = greeting -> Ava
-        if idx == 0:
-            voice = EDGE_TTS_VOICE_INTRO
-        else:
-            voice = EDGE_TTS_VOICE
+        voice = EDGE_TTS_VOICE_INTRO if idx == 0 else EDGE_TTS_VOICE
+        segments.append((m["content"], voice))
 
-        try:
-            chunk = await tts_to_mp3_bytes(text, voice)
-            audio_buf.write(chunk)
-        except Exception as e:
-            print(f"[WARN] Failed to synthesize intro chunk {idx}: {e}")
+    # both clips are synthesized concurrently and stitched back in order
+    audio_bytes = b""
+    try:
+        audio_bytes = await synthesize_segments(segments)
+    except Exception as e:
+        print(f"[WARN] Failed to synthesize intro audio: {e}")
 
-    audio_bytes = audio_buf.getvalue()
     audio_b64 = base64.b64encode(audio_bytes).decode("ascii") if audio_bytes else None
 
     return StartSessionResponse(
@@ -1142,54 +1446,24 @@ async def turn(req: TurnRequest):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Core ClinAI logic
-    result = session.handle_turn(req.user_input)
+    # Core ClinAI logic (off the event loop, in order with this caller's other turns)
+    result = await TURN_ENGINE.run(req.session_id, session.handle_turn, req.user_input)
     agent_message = result["agent_message"]
     end_call_flag = bool(result.get("end_call", False))
 
     # To check if escalated to human rep
     rep_mode = getattr(session, "escalated", False)
 
-    # Split message read between Ava and William on escalation to representative
     audio_b64: Optional[str] = None
     try:
-        if rep_mode and FAKE_REP_TRIGGER in agent_message:
-            # Split into transfer text (Ava) + rep intro (William)
-            before, sep, after = agent_message.partition(FAKE_REP_TRIGGER)
-            transfer_text = before.strip()
-            rep_text = (sep + " " + after).strip()
-
-            combined_mp3 = b""
-
-            # Ava reads the transfer message
-            if transfer_text:
-                ava_bytes = await tts_to_mp3_bytes(
-                    transfer_text, voice=EDGE_TTS_VOICE
-                )
-                combined_mp3 += ava_bytes
-            
-            # William reads his intro
-            william_bytes = await tts_to_mp3_bytes(
-                rep_text, voice=EDGE_TTS_FAKE_REP_VOICE
-            )
-            combined_mp3 += william_bytes
-
-            audio_b64 = base64.b64encode(combined_mp3).decode("ascii")
-
-        else:
-            # Normal case: single voice for the whole message
-            voice = EDGE_TTS_FAKE_REP_VOICE if rep_mode else EDGE_TTS_VOICE
-            mp3_bytes = await tts_to_mp3_bytes(agent_message, voice=voice)
-            audio_b64 = base64.b64encode(mp3_bytes).decode("ascii")
-
+        audio_b64 = await _agent_audio_b64(agent_message, rep_mode)
     except Exception as e:
         print(f"[WARN] TTS failed: {e}")
         audio_b64 = None
 
     # End the call if needed
     if end_call_flag:
-        session.end()
-        sessions.pop(req.session_id, None)
+        await _finish_session(req.session_id, session)
 
     return TurnResponse(
         agent_message=agent_message,
@@ -1206,81 +1480,37 @@ async def voice_turn(
     Voice turn for browser clients:
 
     - Browser records audio as WebM/Opus
-    - it converts to 16k mono WAV via ffmpeg
+    - it's decoded in memory to 16k mono float32 via ffmpeg pipes
+    - leading/trailing silence is trimmed; silent uploads skip Whisper entirely
     - Run Whisper with same gating logic as transcriber.py
-    - If text == "" -> "Sorry, I didn’t catch that clearly. Could you repeat?"
+    - If text == "" -> "Are you still there?" presence check
     - Otherwise send text into ClinAISession.handle_turn
     """
     session = sessions.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Convert WebM/Opus -> 16k mono WAV (Faster-Whisper not compatible with WebM/Opus)
-    with tempfile.TemporaryDirectory() as tmpdir:
-        in_path = os.path.join(tmpdir, "input.webm")
-        out_path = os.path.join(tmpdir, "input_16k.wav")
-
-        # Save uploaded file
-        with open(in_path, "wb") as f:
-            f.write(await audio.read())
-
-        # Call ffmpeg
-        ffmpeg_cmd = [
-        FFMPEG_BIN,
-        "-y",
-        "-i", in_path,
-        "-ac", "1",
-        "-ar", "16000",
-        "-f", "wav",
-        "-acodec", "pcm_s16le",
-        out_path,
-    ]
+    text = await _transcribe_upload(session, audio)
+    return await _voice_turn_response(session_id, session, text)
 
-        proc = subprocess.run(
-            [FFMPEG_BIN, "-y", "-i", in_path, out_path],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        if proc.returncode != 0:
-            print("[STT] ffmpeg stderr:", proc.stderr.decode(errors="ignore")[:300])
-            raise HTTPException(
-                status_code=500,
-                detail="ffmpeg failed to convert audio",
-            ) 
 
-        # looser threshold for drug names
-        min_conf = -2.0 if getattr(session, "refill_state", None) == "drug_name" else -0.70
-        text = transcribe_file_with_gate(out_path, min_conf=min_conf)
+async def _voice_turn_response(session_id: str, session: ClinAISession, text: str) -> TurnResponse:
+    # Transcript -> agent reply + audio (shared by /voice_turn and /voice_stream)
+
+    # Escalation state (fake human rep): Ava before escalation, William after
+    rep_mode = getattr(session, "escalated", False)
 
-    # -------- Handle silence / low-confidence --------
-    
-    # if confidence threshold not met
-    if text == "[Inaudible Message]":
-        pass # let the LLM handle it
-    
     # if no speech is detected
-    elif not text:
-        patient = getattr(session, "patient", None)
-        first_name = getattr(patient, "first_name", None)
-        if first_name:
-            agent_message = f"Are you still there, {first_name}?"
-        else:
-            agent_message = "Are you still there?"
-
-        # Use Ava before escalation, William after escalation
-        rep_mode = getattr(session, "escalated", False)
-        
-        # Simple Ava voice for presence check
+    if not text:
+        agent_message = _still_there_message(session)
+
         audio_b64 = None
         try:
-            voice = EDGE_TTS_FAKE_REP_VOICE if rep_mode else EDGE_TTS_VOICE
-            mp3_bytes = await tts_to_mp3_bytes(agent_message, voice)
-            audio_b64 = base64.b64encode(mp3_bytes).decode("ascii")
+            audio_b64 = await _agent_audio_b64(agent_message, rep_mode)
         except Exception as e:
             print(f"[WARN] TTS failed for silence prompt: {e}")
             audio_b64 = None
-        
+
         return TurnResponse(
             agent_message=agent_message,
             end_call=False,
@@ -1289,46 +1519,17 @@ async def voice_turn(
         )
 
     # Normal voice → text turn
-    result = session.handle_turn(text)
+    result = await TURN_ENGINE.run(session_id, session.handle_turn, text)
     agent_message = result["agent_message"]
     end_call_flag = bool(result.get("end_call", False))
 
-    # Escalation state (fake human rep)
+    # re-check: this turn may have been the escalation
     rep_mode = getattr(session, "escalated", False)
 
     # TTS (same logic as /turn)
     audio_b64: Optional[str] = None
     try:
-        '''If we are in rep mode and the message contains William's intro,
-          split it so Ava speaks the transfer, William speaks the intro.'''
-        if rep_mode and FAKE_REP_TRIGGER in agent_message:
-            before, sep, after = agent_message.partition(FAKE_REP_TRIGGER)
-            transfer_text = before.strip()
-            rep_text = (sep + " " + after).strip()
-
-            combined_mp3 = b""
-
-            # Ava reads the transfer message
-            if transfer_text:
-                ava_bytes = await tts_to_mp3_bytes(
-                    transfer_text, voice=EDGE_TTS_VOICE
-                )
-                combined_mp3 += ava_bytes
-
-            # William reads his intro
-            william_bytes = await tts_to_mp3_bytes(
-                rep_text, voice=EDGE_TTS_FAKE_REP_VOICE
-            )
-            combined_mp3 += william_bytes
-
-            audio_b64 = base64.b64encode(combined_mp3).decode("ascii")
-
-        else:
-            # Normal case: single voice for the whole message
-            voice = EDGE_TTS_FAKE_REP_VOICE if rep_mode else EDGE_TTS_VOICE
-            mp3_bytes = await tts_to_mp3_bytes(agent_message, voice=voice)
-            audio_b64 = base64.b64encode(mp3_bytes).decode("ascii")
-
+        audio_b64 = await _agent_audio_b64(agent_message, rep_mode)
     except Exception as e:
         print(f"[WARN] TTS failed (voice_turn): {e}")
         audio_b64 = None
@@ -1336,8 +1537,7 @@ async def voice_turn(
     # Note: we do NOT end the call here; that logic is identical to /turn
     # and handled via `end_call_flag`.
     if end_call_flag:
-        session.end()
-        sessions.pop(session_id, None)
+        await _finish_session(session_id, session)
 
     return TurnResponse(
         agent_message=agent_message,
@@ -1345,3 +1545,147 @@ async def voice_turn(
         audio_b64=audio_b64,
         user_transcript=text,
     )
+
+# ----- Streaming variants -----
+# Same turn logic as /turn and /voice_turn, but the reply comes back as server-sent events:
+#   event: meta      -> {"agent_message", "end_call", "user_transcript"}
+#   event: audio     -> base64 MP3 chunk, forwarded as soon as edge-tts yields it
+#   event: done      -> {}
+# Concatenating the decoded audio frames in order gives the same MP3 as `audio_b64`.
+#
+# With LLM_STREAM_TTS (default on), LLM-generated replies (admin info, availability
+# readouts, fallback answers) are streamed from the model instead:
+#   event: sentence  -> {"text"} as soon as the sentence is complete, then its audio
+#   event: meta      -> sent once the turn has finished (after the audio)
+#   event: error     -> {"detail"} if the turn itself failed
+# Replies that don't come from the LLM still send meta first, as above.
+
+LLM_STREAM_TTS = os.getenv("LLM_STREAM_TTS", "true").lower() in ("1", "true", "yes", "y")
+
+@app.post("/turn_stream")
+async def turn_stream(req: TurnRequest):
+    session = sessions.get(req.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    if LLM_STREAM_TTS:
+        return _streamed_turn_response(req.session_id, session, req.user_input)
+
+    result = await TURN_ENGINE.run(req.session_id, session.handle_turn, req.user_input)
+    return _turn_event_stream(req.session_id, session, result)
+
+@app.post("/voice_turn_stream")
+async def voice_turn_stream(
+    session_id: str = Form(...),
+    audio: UploadFile = File(...),
+):
+    session = sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    text = await _transcribe_upload(session, audio)
+
+    if not text:
+        result = {"agent_message": _still_there_message(session), "end_call": False}
+        return _turn_event_stream(session_id, session, result, user_transcript=None)
+
+    if LLM_STREAM_TTS:
+        return _streamed_turn_response(session_id, session, text, user_transcript=text)
+
+    result = await TURN_ENGINE.run(session_id, session.handle_turn, text)
+    return _turn_event_stream(session_id, session, result, user_transcript=text)
+
+# ----- Streaming speech input -----
+# WebSocket /voice_stream?session_id=...
+#   client -> server: binary frames of 16 kHz mono PCM16 while the mic is open,
+#                     text {"type": "end"} to end the utterance right away (other text
+#                     frames, malformed or not, are ignored)
+#   server -> client: {"type": "partial", "text"}     while the caller is talking
+#                     {"type": "final", "text"}       once the endpoint is detected
+#                     {"type": "turn", ...}           same fields as TurnResponse
+#                     {"type": "error", "detail"}     STT overloaded (socket is closed)
+# The client should stop sending frames while the agent reply is playing.
+
+def _control_type(text: Optional[str]) -> Optional[str]:
+    # {"type": ...} of a client text frame; anything malformed is ignored, not fatal
+    try:
+        control = json.loads(text or "{}")
+    except ValueError:
+        return None
+    return control.get("type") if isinstance(control, dict) else None
+
+@app.websocket("/voice_stream")
+async def voice_stream(websocket: WebSocket, session_id: str):
+    await websocket.accept()
+    session = sessions.get(session_id)
+    if not session:
+        await websocket.close(code=4404, reason="Session not found")
+        return
+
+    recognizer = StreamingRecognizer(min_conf=_stt_min_conf(session), profile=_stt_profile(session))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                events = await recognizer.feed(message["bytes"])
+            elif _control_type(message.get("text")) == "end":
+                events = await recognizer.flush()
+            else:
+                continue
+
+            for kind, text in events:
+                await websocket.send_json({"type": kind, "text": text})
+                if kind != "final":
+                    continue
+
+                reply = await _voice_turn_response(session_id, session, text)
+                await websocket.send_json({"type": "turn", **reply.model_dump()})
+                if reply.end_call:
+                    await websocket.close()
+                    return
+                # the turn may have moved the session into the drug-name state
+                recognizer.min_conf = _stt_min_conf(session)
+                recognizer.profile = _stt_profile(session)
+    except WebSocketDisconnect:
+        pass
+    except STTBusyError as e:
+        print(f"[STT] rejected: {e}")
+        await websocket.send_json({"type": "error", "detail": "Speech recognition is busy, please try again."})
+        await websocket.close(code=1013)
+    finally:
+        recognizer.close()
+
+@app.get("/healthz")
+async def healthz():
+    # Liveness: the process is up and serving (models may still be loading)
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    # Readiness: 503 until every model is loaded and warmed up
+    status = MODEL_REGISTRY.stats()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+async def metrics():
+    # Lightweight JSON counters for load testing / dashboards
+    return {
+        "active_sessions": len(sessions),
+        "turns": TURN_ENGINE.stats(),
+        "models": MODEL_REGISTRY.stats(),
+        "stt": STT_POOL.stats(),
+        "stt_pools": stt_pool_stats(),
+        "stt_profiles": profile_stats(),
+        "refills": refill_stats(),
+        "classifiers": classifier_stats(),
+        "llm": llm_health_stats(),
+        "llm_prefix": llm_prefix_stats(),
+        "chat_history": chat_history_stats(),
+        "stt_batching": stt_batching_stats(),
+        "vad": vad_stats(),
+        "tts_cache": tts_cache_stats(),
+        "tts_templates": template_stats(),
+    }
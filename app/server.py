@@ -0,0 +1,227 @@
+"""
+app/server.py
+
+Pre-fork server for the web app.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker imports
+app.clinai_web and loads its own copy of the classifiers. Here the parent imports the
+app once, preloads every fork-safe model (ModelRegistry.preload), freezes the GC and
+forks the workers, which all accept on the one listening socket. The model weights
+stay shared copy-on-write between them:
+
+- gc is disabled while loading and gc.freeze() moves everything loaded so far to the
+  permanent generation, so collections in the workers never write to (and so never
+  un-share) the pages holding those objects' headers.
+- The checkpoints are safetensors (save_pretrained's default), and the tensor storage
+  is never written after load, so those pages stay shared for the worker's lifetime.
+- Whisper isn't preloaded: CTranslate2 starts its replica threads at load and they don't
+  survive fork, so each worker loads its own. Warmups also run in the workers.
+- The parent sets torch to one thread while preloading (no OpenMP pool to inherit);
+  workers get cpu_count / workers intra-op threads each (TORCH_THREADS overrides).
+
+The parent supervises: a worker that dies is forked again from the preloaded state.
+The appointment sweeper (an APScheduler thread) runs in worker 0 only, so there's one
+per pod instead of one per worker: the parent sets APPT_SWEEPER=false before importing
+the app, so it never has a scheduler thread alive when it forks, and worker 0 (or its
+replacement) starts the sweeper after the fork.
+
+    python -m app.server --workers 4 --port 8000
+    python -m app.server --workers 4 --no-preload     # baseline: each worker loads its own
+
+Per-worker memory (from /proc/<pid>/smaps_rollup; USS = private pages only, what
+killing that worker would free) is printed --report-after seconds after startup and
+on SIGUSR1, so the two modes can be compared directly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+
+# ---------- memory report ----------
+
+def memory_stats(pid: int) -> Dict[str, float]:
+    # smaps_rollup values are kB; USS = Private_Clean + Private_Dirty
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024, 1),
+    }
+
+
+def print_memory_report(workers: Dict[int, int], preload: bool) -> None:
+    print(f"[server] memory ({'preloaded' if preload else 'no preload'}):")
+    total_uss = 0.0
+    for pid in [os.getpid(), *workers]:
+        try:
+            mem = memory_stats(pid)
+        except OSError:
+            continue
+        role = "parent" if pid == os.getpid() else f"worker {workers[pid]}"
+        total_uss += mem["uss_mb"]
+        print(
+            f"[server]   {role:<9} pid={pid:<7} uss={mem['uss_mb']}MB pss={mem['pss_mb']}MB "
+            f"rss={mem['rss_mb']}MB shared={mem['shared_mb']}MB"
+        )
+    print(f"[server]   total uss={total_uss:.1f}MB")
+
+
+# ---------- parent / worker ----------
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _set_torch_threads(n: int) -> None:
+    # only if the parent imported torch (preloaded torch backend); otherwise torch's own default
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(n)
+
+
+def _preload() -> None:
+    from app.clinai_web import MODEL_REGISTRY
+    from classifiers.backends import CLASSIFIER_BACKEND
+
+    if CLASSIFIER_BACKEND == "torch":
+        import torch
+        torch.set_num_threads(1)  # before the first op, so no OpenMP pool exists at fork
+    MODEL_REGISTRY.preload()
+
+
+_sweeper = None  # worker 0's appointment sweeper
+
+
+def _run_worker(sock: socket.socket, index: int, torch_threads: int, log_level: str) -> None:
+    gc.enable()
+    _set_torch_threads(torch_threads)
+
+    # connections the parent's engine opened while preloading belong to the parent
+    from app.db.session import engine
+    engine.dispose(close=False)
+
+    if index == 0:
+        global _sweeper
+        from app.services import appointments as ap
+        _sweeper = ap.start_scheduler()
+
+    import uvicorn
+    from app.clinai_web import app
+
+    print(f"[server] worker {index} started (pid {os.getpid()})")
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=10))
+    server.run(sockets=[sock])
+
+
+def _fork_worker(sock: socket.socket, index: int, torch_threads: int, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        # child: default signal handling back on (uvicorn installs its own)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGUSR1, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(sock, index, torch_threads, log_level)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", "2")))
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="fork before loading anything (baseline for the memory report)")
+    parser.add_argument("--report-after", type=float, default=60.0,
+                        help="seconds after startup to print the per-worker memory report (0 = only on SIGUSR1)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    torch_threads = int(os.getenv("TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // args.workers)
+    # no sweeper thread on import (here or in --no-preload workers); worker 0 starts the only one
+    os.environ["APPT_SWEEPER"] = "false"
+    sock = _bind(args.host, args.port)
+    print(f"[server] listening on {args.host}:{args.port}, {args.workers} workers")
+
+    if args.preload:
+        # no collections while the model objects are created, then freeze them all in place
+        gc.disable()
+        started = time.perf_counter()
+        _preload()
+        gc.freeze()
+        print(f"[server] preloaded in {time.perf_counter() - started:.1f}s, {gc.get_freeze_count()} objects frozen")
+
+    workers: Dict[int, int] = {}  # pid -> worker index
+    for index in range(args.workers):
+        workers[_fork_worker(sock, index, torch_threads, args.log_level)] = index
+    gc.enable()
+
+    stopping = False
+    report_requested = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _report(signum, frame):
+        nonlocal report_requested
+        report_requested = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGUSR1, _report)
+
+    report_at = time.monotonic() + args.report_after if args.report_after > 0 else None
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            index = workers.pop(pid, None)
+            if index is not None and not stopping:
+                print(f"[server] worker {index} (pid {pid}) exited with {os.waitstatus_to_exitcode(status)}, restarting")
+                workers[_fork_worker(sock, index, torch_threads, args.log_level)] = index
+            continue
+
+        if report_requested or (report_at is not None and time.monotonic() >= report_at):
+            report_requested, report_at = False, None
+            print_memory_report(workers, args.preload)
+        time.sleep(0.5)
+
+    print("[server] all workers stopped")
+
+
+if __name__ == "__main__":
+    main()
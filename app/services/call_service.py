@@ -5,7 +5,7 @@ from typing import Optional, List
 from sqlalchemy import select, func
 from app.db.session import get_session
 from app.db.models import Call, Transcript
-from app.voice.llm import query_llm, notes_system_prompt
+from app.voice.llm import query_llm, query_llm_async, notes_system_prompt
 
 # Core lifecycle
 def start_call(patient_id: Optional[int] = None, from_number: Optional[str] = None) -> Call:
@@ -32,17 +32,26 @@ def set_intent(call_id: int, intent: Optional[list]) -> None:
         c.intent = intent
         s.commit()
 
-# use llm to generate call notes based on chat history
-def call_notes(chat_history: list, model: str):
+NOTES_PROMPT = "That was the end of the coversation, now please summarize the entire conversation into 2-3 brief sentences."
+
+# swap the agent's system prompts for the note-taking one
+def _notes_history(chat_history: list) -> list:
     # remove system prompts
     for _ in range(2):
         chat_history.pop(0)
     chat_history.insert(0, {'role':'system', 'content': notes_system_prompt})
-    prompt = "That was the end of the coversation, now please summarize the entire conversation into 2-3 brief sentences."
-    notes = query_llm(prompt, chat_history, model)
+    return chat_history
+
+# use llm to generate call notes based on chat history
+def call_notes(chat_history: list, model: str):
+    notes = query_llm(NOTES_PROMPT, _notes_history(chat_history), model)
     
     return notes
 
+# same, awaited from the web app's end-of-call path (no worker thread held during the LLM call)
+async def call_notes_async(chat_history: list, model: str):
+    return await query_llm_async(NOTES_PROMPT, _notes_history(chat_history), model)
+
 def end_call(call_id: int, *, resolved: bool, escalated: bool, notes: Optional[str] = None) -> None:
     # Close out a call when finished, set resolved/escalated + optional summary notes
     with get_session() as s:
@@ -0,0 +1,207 @@
+# app/services/model_bundle.py
+"""
+Pinned, local copies of every model the app loads.
+
+By default the classifiers (INTENT_MODEL_ID / APPT_CONTEXT_MODEL_ID / CONFIRM_MODEL_ID,
+MULTITASK_MODEL_ID) and the Whisper sizes (STT_MODEL, STT_ACCURATE_MODEL, ...) resolve
+through the Hugging Face Hub on every startup: a network round-trip per model, and no
+startup at all in an air-gapped pod.
+
+The CLI below downloads them once into a bundle directory, pins each one to the
+commit it got, and records a sha256 per file in manifest.json:
+
+    python -m app.services.model_bundle fetch                    # pins latest on first run
+    python -m app.services.model_bundle fetch --whisper base small large-v3
+    python -m app.services.model_bundle fetch --update           # re-pin to latest
+    python -m app.services.model_bundle verify                   # re-hash, exit 1 on drift
+
+fetch reuses the revisions already in the manifest, so running it on every replica
+(or baking the directory into the image) gives the same bytes everywhere.
+
+At runtime resolve_model() / resolve_whisper() map a model id to its bundle directory
+when the manifest has it. With MODEL_BUNDLE_OFFLINE=true the Hub is never contacted:
+HF_HUB_OFFLINE is set and a model missing from the bundle fails at load time instead
+of being downloaded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+MODEL_BUNDLE_DIR = os.getenv("MODEL_BUNDLE_DIR", "./models")
+MODEL_BUNDLE_OFFLINE = os.getenv("MODEL_BUNDLE_OFFLINE", "false").lower() in ("1", "true", "yes", "y")
+MANIFEST_FILE = "manifest.json"
+
+# faster-whisper sizes are keyed separately from HF repo ids in the manifest
+WHISPER_PREFIX = "whisper:"
+
+if MODEL_BUNDLE_OFFLINE:
+    # read by huggingface_hub / transformers when they're first imported
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+_manifest: Optional[Dict[str, dict]] = None
+_manifest_lock = threading.Lock()
+
+
+def _manifest_path(bundle_dir: str = MODEL_BUNDLE_DIR) -> str:
+    return os.path.join(bundle_dir, MANIFEST_FILE)
+
+
+def read_manifest(bundle_dir: str = MODEL_BUNDLE_DIR) -> Dict[str, dict]:
+    path = _manifest_path(bundle_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _bundled() -> Dict[str, dict]:
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = read_manifest()
+        return _manifest
+
+
+# ---------- runtime resolution ----------
+
+def _resolve(key: str, fallback: str) -> str:
+    entry = _bundled().get(key)
+    if entry is not None:
+        return os.path.join(MODEL_BUNDLE_DIR, entry["path"])
+    if MODEL_BUNDLE_OFFLINE and not os.path.isdir(fallback):
+        raise RuntimeError(
+            f"{fallback!r} is not in the model bundle at {MODEL_BUNDLE_DIR} and MODEL_BUNDLE_OFFLINE=true. "
+            "Fetch it first: python -m app.services.model_bundle fetch"
+        )
+    return fallback
+
+
+def resolve_model(model_id: str) -> str:
+    # HF repo id (or local dir) -> pinned local dir when bundled
+    return _resolve(model_id, model_id)
+
+
+def resolve_whisper(model_size: str) -> str:
+    # faster-whisper size ("base", "large-v3", ...) -> pinned CTranslate2 dir when bundled
+    return _resolve(WHISPER_PREFIX + model_size, model_size)
+
+
+# ---------- fetch / verify CLI ----------
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_dir(path: str) -> Dict[str, str]:
+    files = {}
+    for root, dirs, names in os.walk(path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]  # skip .cache/huggingface
+        for name in names:
+            full = os.path.join(root, name)
+            files[os.path.relpath(full, path)] = _sha256(full)
+    return dict(sorted(files.items()))
+
+
+def _local_name(key: str) -> str:
+    return key.replace(WHISPER_PREFIX, "whisper-").replace("/", "--")
+
+
+def _whisper_repo(model_size: str) -> str:
+    from faster_whisper.utils import _MODELS
+    return model_size if "/" in model_size else _MODELS[model_size]
+
+
+def default_artifacts() -> Dict[str, str]:
+    # manifest key -> HF repo id, for everything the current env would load
+    from app.voice.stt_profiles import PROFILES
+    from classifiers.tasks import TASK_MODEL_IDS
+
+    artifacts = {model_id: model_id for model_id in TASK_MODEL_IDS.values() if not os.path.isdir(model_id)}
+    multitask_id = os.getenv("MULTITASK_MODEL_ID", "")
+    if multitask_id and not os.path.isdir(multitask_id):
+        artifacts[multitask_id] = multitask_id
+    for size in {PROFILES["fast"].model_size, PROFILES["accurate"].model_size}:
+        artifacts[WHISPER_PREFIX + size] = _whisper_repo(size)
+    return artifacts
+
+
+def fetch(artifacts: Dict[str, str], bundle_dir: str, update: bool = False) -> Dict[str, dict]:
+    from huggingface_hub import HfApi, snapshot_download
+
+    api = HfApi()
+    manifest = read_manifest(bundle_dir)
+    for key, repo in artifacts.items():
+        pinned = manifest.get(key, {}).get("revision")
+        revision = pinned if pinned and not update else api.model_info(repo).sha
+
+        local = _local_name(key)
+        path = snapshot_download(repo, revision=revision, local_dir=os.path.join(bundle_dir, local))
+        files = _hash_dir(path)
+        manifest[key] = {"repo": repo, "revision": revision, "path": local, "files": files}
+        print(f"[bundle] {key}: {repo}@{revision[:12]} ({len(files)} files) -> {path}")
+
+        # write after every model so an interrupted fetch keeps what it finished
+        os.makedirs(bundle_dir, exist_ok=True)
+        with open(_manifest_path(bundle_dir), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def verify(bundle_dir: str) -> List[str]:
+    # -> problems found (missing / changed / unexpected files); empty when the bundle is intact
+    problems = []
+    manifest = read_manifest(bundle_dir)
+    if not manifest:
+        return [f"no {MANIFEST_FILE} in {bundle_dir}"]
+    for key, entry in manifest.items():
+        path = os.path.join(bundle_dir, entry["path"])
+        actual = _hash_dir(path) if os.path.isdir(path) else {}
+        for name, digest in entry["files"].items():
+            if name not in actual:
+                problems.append(f"{key}: missing {name}")
+            elif actual[name] != digest:
+                problems.append(f"{key}: checksum mismatch for {name}")
+        for name in actual.keys() - entry["files"].keys():
+            problems.append(f"{key}: unexpected file {name}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["fetch", "verify"])
+    parser.add_argument("--bundle-dir", default=MODEL_BUNDLE_DIR)
+    parser.add_argument("--whisper", nargs="+", default=None,
+                        help="fetch: Whisper sizes to bundle (default: the web fast + accurate tiers)")
+    parser.add_argument("--update", action="store_true", help="fetch: re-pin every model to its latest revision")
+    args = parser.parse_args()
+
+    if args.command == "fetch":
+        artifacts = default_artifacts()
+        if args.whisper is not None:
+            artifacts = {k: v for k, v in artifacts.items() if not k.startswith(WHISPER_PREFIX)}
+            artifacts.update({WHISPER_PREFIX + size: _whisper_repo(size) for size in args.whisper})
+        fetch(artifacts, args.bundle_dir, update=args.update)
+        return
+
+    problems = verify(args.bundle_dir)
+    for problem in problems:
+        print(f"[bundle] {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"[bundle] {args.bundle_dir} OK")
+
+
+if __name__ == "__main__":
+    main()
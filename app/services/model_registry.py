@@ -0,0 +1,142 @@
+# app/services/model_registry.py
+"""
+Background model loading for the web app.
+
+Importing app.clinai_web used to load Whisper and the three DistilBERT classifiers
+one after another before uvicorn could even bind its port. Each model is now
+registered here with a load function and an optional warmup (one dummy inference,
+so the first real caller doesn't pay for lazy kernel / allocator init), and
+start() runs them all concurrently on a small thread pool.
+
+The process serves /healthz right away; /readyz stays 503 until every required model
+is warm, so the load balancer only routes calls to a worker that can answer them.
+Optional entries (required=False, e.g. the Ollama warm-up: the LLM path has its own
+fallback) load the same way and show up in stats(), but never hold readiness back.
+
+Under the pre-fork server (app/server.py) the parent calls preload() first: the
+fork-safe models are loaded once and the workers inherit them copy-on-write, so
+start() in each worker only finds them already loaded and runs the warmups.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+PENDING, LOADING, WARMING, READY, FAILED = "pending", "loading", "warming", "ready", "failed"
+
+
+@dataclass
+class _Entry:
+    load: Callable[[], object]
+    warmup: Optional[Callable[[], None]]
+    # False when loading starts threads that wouldn't survive a fork (CTranslate2 workers)
+    fork_safe: bool = True
+    # False: loads in the background like the rest but doesn't gate readiness
+    required: bool = True
+    preloaded: bool = False
+    state: str = PENDING
+    load_s: float = 0.0
+    warmup_s: float = 0.0
+    error: Optional[str] = None
+
+
+class ModelRegistry:
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._started_at: Optional[float] = None
+        self._ready_at: Optional[float] = None
+
+    def register(
+        self,
+        name: str,
+        load: Callable[[], object],
+        warmup: Optional[Callable[[], None]] = None,
+        fork_safe: bool = True,
+        required: bool = True,
+    ) -> None:
+        self._entries[name] = _Entry(load=load, warmup=warmup, fork_safe=fork_safe, required=required)
+
+    # ---------- loading ----------
+
+    def start(self) -> None:
+        # Non-blocking: every registered model loads + warms on its own worker thread
+        if self._executor is not None:
+            return
+        self._started_at = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="clinai-load")
+        for name in self._entries:
+            self._executor.submit(self._load_one, name)
+
+    def preload(self) -> None:
+        # Pre-fork parent: load (no warmup, no state change) every fork-safe model on this thread.
+        # Warmups wait for the workers: a forward pass here would start intra-op thread pools
+        # that the forked children can't use.
+        for name, entry in self._entries.items():
+            if entry.fork_safe:
+                started = time.perf_counter()
+                entry.load()
+                entry.preloaded = True
+                print(f"[ClinAI-Web] {name} preloaded in {time.perf_counter() - started:.1f}s")
+
+    def _set(self, entry: _Entry, **fields) -> None:
+        with self._lock:
+            for key, value in fields.items():
+                setattr(entry, key, value)
+            if self._ready_at is None and all(e.state == READY for e in self._entries.values() if e.required):
+                self._ready_at = time.perf_counter()
+                print(f"[ClinAI-Web] All required models ready in {self._ready_at - self._started_at:.1f}s")
+
+    def _load_one(self, name: str) -> None:
+        entry = self._entries[name]
+        try:
+            self._set(entry, state=LOADING)
+            started = time.perf_counter()
+            entry.load()
+            self._set(entry, state=WARMING, load_s=time.perf_counter() - started)
+
+            started = time.perf_counter()
+            if entry.warmup is not None:
+                entry.warmup()
+            self._set(entry, state=READY, warmup_s=time.perf_counter() - started)
+            print(f"[ClinAI-Web] {name} ready (load {entry.load_s:.1f}s, warmup {entry.warmup_s:.2f}s)")
+        except Exception as e:
+            traceback.print_exc()
+            print(f"[WARN] {name} failed to load: {e}")
+            self._set(entry, state=FAILED, error=str(e))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- status ----------
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_at is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {
+                name: {
+                    "state": e.state,
+                    "load_s": round(e.load_s, 2),
+                    "warmup_s": round(e.warmup_s, 3),
+                    "preloaded": e.preloaded,
+                    "required": e.required,
+                    **({"error": e.error} if e.error else {}),
+                }
+                for name, e in self._entries.items()
+            }
+        ready_s = None
+        if self._ready_at is not None:
+            ready_s = round(self._ready_at - self._started_at, 2)
+        return {"ready": self.ready, "ready_s": ready_s, "models": models}
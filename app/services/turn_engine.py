@@ -0,0 +1,143 @@
+# app/services/turn_engine.py
+"""
+Turn execution engine for the web app.
+
+ClinAISession work is fully synchronous (DistilBERT passes, Postgres commits,
+Ollama calls). Running it inline in an async endpoint stalls the uvicorn loop
+for every other live call, so it runs here instead:
+
+- A bounded thread pool executes the blocking work.
+- One asyncio.Lock per session keeps each caller's turns in order,
+  while different callers progress in parallel.
+- Queue depth / wait / run timings are tracked for the /metrics endpoint.
+
+Threads (not processes) are used on purpose: sessions hold ORM rows and
+in-memory conversation state that can't be pickled across processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict
+
+
+class TurnEngine:
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="clinai-turn"
+        )
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        # counters (touched from both the event loop and worker threads)
+        self._stats_lock = threading.Lock()
+        self._queued = 0              # submitted, waiting for a free worker
+        self._running = 0             # currently executing on a worker
+        self._waiting_on_session = 0  # blocked behind an earlier turn of the same caller
+        self._max_queue_depth = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0           # callers that went away; their turn still ran to the end
+        self._total_wait_s = 0.0
+        self._total_run_s = 0.0
+
+    # ---------- per-session ordering ----------
+
+    @asynccontextmanager
+    async def session(self, session_id: str):
+        # Hold the caller's lock for the whole block (used when a turn spans several steps)
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._waiting_on_session += 1
+        try:
+            await lock.acquire()
+        finally:
+            self._waiting_on_session -= 1
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def forget(self, session_id: str) -> None:
+        # Drop the lock once a session has ended
+        self._locks.pop(session_id, None)
+
+    # ---------- execution ----------
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Run a blocking callable on the pool without any session ordering
+        submitted_at = time.perf_counter()
+        with self._stats_lock:
+            self._queued += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        def _job():
+            started_at = time.perf_counter()
+            with self._stats_lock:
+                self._queued -= 1
+                self._running += 1
+                self._total_wait_s += started_at - submitted_at
+            try:
+                return fn(*args)
+            finally:
+                with self._stats_lock:
+                    self._running -= 1
+                    self._total_run_s += time.perf_counter() - started_at
+
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(self._executor, _job)
+        try:
+            result = await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            # client went away mid-turn: the worker keeps going, so don't let the
+            # caller's lock be released until the session state is consistent again,
+            # even if this request is cancelled again while it waits
+            with self._stats_lock:
+                self._cancelled += 1
+            while not fut.done():
+                try:
+                    await asyncio.wait([fut])
+                except asyncio.CancelledError:
+                    continue
+            if not fut.cancelled():
+                fut.exception()  # retrieved: nobody else will look at the outcome
+            raise
+        except Exception:
+            with self._stats_lock:
+                self._failed += 1
+            raise
+
+        with self._stats_lock:
+            self._completed += 1
+        return result
+
+    async def run(self, session_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+        # Run a blocking callable for one session, after any earlier turns of that session
+        async with self.session(session_id):
+            return await self.submit(fn, *args)
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            done = self._completed + self._failed + self._cancelled
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "waiting_on_session": self._waiting_on_session,
+                "max_queue_depth": self._max_queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(1000 * self._total_wait_s / done, 2) if done else 0.0,
+                "avg_run_ms": round(1000 * self._total_run_s / done, 2) if done else 0.0,
+                "tracked_sessions": len(self._locks),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,60 @@
+"""
+app/voice/audio_decode.py
+
+In-memory decoding of browser audio (WebM/Opus) for Whisper.
+
+The upload bytes are piped through ffmpeg's stdin/stdout as an asyncio subprocess and
+come back as 16 kHz mono float32 samples, which WhisperModel.transcribe accepts
+directly. No temp files, no WAV round trip and no blocking subprocess.run on the
+event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # what Whisper expects
+
+# Server-only: expect ffmpeg to be installed on the container and available on PATH.
+FFMPEG_BIN = os.getenv("FFMPEG_BIN") or shutil.which("ffmpeg")
+
+if not FFMPEG_BIN: # raise error if ffmpeg not found
+    raise RuntimeError(
+        "ffmpeg not found. Install it on the server (e.g., Nixpacks aptPkgs=['ffmpeg']) "
+        "or set the FFMPEG_BIN environment variable to the ffmpeg path."
+    )
+
+
+class AudioDecodeError(RuntimeError):
+    pass
+
+
+async def decode_to_float32(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # Encoded bytes (any container ffmpeg understands) -> mono float32 [-1, 1] at `sample_rate`
+    if not data:
+        return np.zeros(0, dtype=np.float32)
+
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_BIN,
+        "-hide_banner",
+        "-loglevel", "error",
+        "-i", "pipe:0",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate(input=data)
+
+    if proc.returncode != 0:
+        raise AudioDecodeError(err.decode(errors="ignore")[:300])
+
+    return np.frombuffer(out, dtype=np.float32)
@@ -0,0 +1,152 @@
+# app/voice/chat_history.py
+
+"""
+Token-budgeted chat history for the web sessions.
+
+ClinAISession.chat_history used to be a plain list that grew for the whole call and was
+resent in full on every LLM request, so prompt size (and Ollama's prompt processing
+time) kept climbing with call length. ChatHistory is still a list, so add_to_history,
+slicing for call_notes etc. work unchanged, but query_llm sends `for_llm()` instead:
+
+- pinned: the leading system messages (clinic prompt, clinic info, call intro) and
+  whatever the session pin()s after them (the greeting with the patient's name) are
+  always sent, first and unchanged.
+- dedup: a message identical to the one before it is dropped on append (the same
+  user input / LLM reply used to be added twice per turn).
+- budget: after the pinned block, only the newest turns that fit in `budget_tokens`
+  are sent.
+- rolling summary: turns that fall out of the budget are folded into a short summary
+  by a background summarizer, sent as one system message after the pinned block.
+  Until that summary lands the evicted turns are still sent, so nothing is lost.
+
+Token counts are estimates (~4 characters per token): good enough for a budget, no
+tokenizer needed.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+CHAT_BUDGET_TOKENS = int(os.getenv("CHAT_BUDGET_TOKENS", "1200"))
+
+summary_system_prompt = """
+You maintain a running summary of a phone call between a clinic's AI receptionist and a patient.
+You are given the summary so far (may be empty) and the next part of the conversation.
+Reply with ONLY the updated summary in at most 4 short sentences: what the patient asked for,
+dates/times/medications mentioned, and what was decided or is still pending.
+Always keep, word for word, the patient's name and date of birth if they were given,
+and the request currently in progress.
+"""
+
+Message = Dict[str, str]
+
+# one background worker for every session's summaries; the hot path never waits on it
+_SUMMARIZER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clinai-summary")
+
+_stats_lock = threading.Lock()
+_STATS = {"requests": 0, "prompt_tokens": 0, "deduped": 0, "summaries": 0, "summary_failures": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 4  # + per-message overhead
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _STATS[key] += n
+
+
+class ChatHistory(list):
+
+    def __init__(self, messages: List[Message], model: str, budget_tokens: int = CHAT_BUDGET_TOKENS):
+        super().__init__(messages)
+        self.model = model
+        self.budget_tokens = budget_tokens
+        self._lock = threading.Lock()
+        self._summary = ""
+        self._folded = 0          # messages before this index are covered by the summary
+        self._pinned_upto = 0     # set by pin()
+        self._summarizing = False
+
+    def append(self, message: Message) -> None:
+        if self and self[-1]["role"] == message["role"] and self[-1]["content"] == message["content"]:
+            _count("deduped")
+            return
+        super().append(message)
+
+    def pin(self) -> None:
+        # everything added so far is always sent, never budgeted out or summarized
+        self._pinned_upto = len(self)
+
+    def _pinned(self) -> int:
+        n = 0
+        while n < len(self) and self[n]["role"] == "system":
+            n += 1
+        return max(n, self._pinned_upto)
+
+    def for_llm(self) -> List[Message]:
+        # pinned + summary + newest turns within the budget
+        pinned = self._pinned()
+        with self._lock:
+            start = max(pinned, self._folded)
+            summary = self._summary
+            summarizing = self._summarizing
+
+        turns = list(self[start:])
+        keep = 0
+        used = 0
+        for message in reversed(turns):
+            tokens = estimate_tokens(message["content"])
+            if keep and used + tokens > self.budget_tokens:
+                break
+            keep += 1
+            used += tokens
+
+        overflow = turns[:len(turns) - keep]
+        if overflow and not summarizing:
+            self._summarize(overflow, upto=start + len(overflow))
+
+        messages = list(self[:pinned])
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the call so far: {summary}"})
+        messages.extend(turns)  # overflow included until its summary is ready
+
+        _count("requests")
+        _count("prompt_tokens", sum(estimate_tokens(m["content"]) for m in messages))
+        return messages
+
+    # ---------- rolling summary ----------
+
+    def _summarize(self, overflow: List[Message], upto: int) -> None:
+        with self._lock:
+            self._summarizing = True
+            previous = self._summary
+        _SUMMARIZER.submit(self._run_summary, previous, overflow, upto)
+
+    def _run_summary(self, previous: str, overflow: List[Message], upto: int) -> None:
+        from app.voice.llm import query_llm  # llm imports this module
+
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in overflow)
+        prompt = f"Summary so far: {previous or '(none)'}\n\nNext part of the call:\n{transcript}"
+        summary: Optional[str] = None
+        try:
+            summary = query_llm(prompt, [{"role": "system", "content": summary_system_prompt}], self.model).strip()
+        except Exception as e:
+            print(f"[WARN] chat summary failed: {e}")
+        with self._lock:
+            self._summarizing = False
+            if summary and summary not in ("LLM backend error.", "Insufficient OpenAI Credits"):
+                self._summary = summary
+                self._folded = upto
+                _count("summaries")
+            else:
+                _count("summary_failures")
+
+
+def chat_history_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_STATS)
+    stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / stats["requests"], 1) if stats["requests"] else 0.0
+    stats["budget_tokens"] = CHAT_BUDGET_TOKENS
+    return stats
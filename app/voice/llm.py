@@ -2,12 +2,19 @@
 
 import ollama
 
+import asyncio
 import os
-from typing import Dict, List
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional
 
+import httpx
 from dotenv import load_dotenv
 
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from app.voice.llm_health import OLLAMA_HEALTH
+from app.voice.chat_history import ChatHistory
 
 load_dotenv(override=False)
 
@@ -105,71 +112,293 @@ def _is_openai_insufficient_quota(err: Exception) -> bool:
         or "credits" in s and "insufficient" in s
     )
 
-# check if system has Ollama installed
-def _ollama_reachable() -> bool:
-    try:
-        # lightweight call; avoids running a full chat
-        ollama.list()
-        return True
-    except Exception:
-        return False
+# reply shown when neither provider answered
+def _fallback_reply(err: Exception) -> str:
+    if _is_openai_insufficient_quota(err):
+        return "Insufficient OpenAI Credits"
+    return "LLM backend error."
 
-# get response from OpenAI model
-def _openai_chat(messages: List[Dict[str, str]], model: str) -> str:
+def _prefer_ollama() -> bool:
+    return os.getenv("PREFER_OLLAMA", "true").lower() in ("1", "true", "yes", "y")
+
+def _openai_model() -> str:
+    return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+# ----- pooled clients -----
+# One client per provider per process (one HTTP connection pool, kept-alive TLS sessions)
+# instead of a new OpenAI() per call. Async clients are kept per event loop, since an httpx
+# pool can't be shared across loops. OLLAMA_HOST / OPENAI_BASE_URL point them somewhere
+# else, e.g. at scripts/fake_llm_server.py.
+
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+_clients_lock = threading.Lock()
+_clients: Dict[str, object] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, object]]" = weakref.WeakKeyDictionary()
+
+# a forked worker (app/server.py) must not reuse the parent's connections
+os.register_at_fork(after_in_child=_clients.clear)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+
+def _openai_api_key() -> str:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set")
+    return api_key
+
+def _client(name: str, factory: Callable[[], object]):
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = factory()
+        return client
+
+def _async_client(name: str, factory: Callable[[], object]):
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(name)
+        if client is None:
+            client = clients[name] = factory()
+        return client
+
+def _ollama_client() -> ollama.Client:
+    return _client("ollama", lambda: ollama.Client(timeout=LLM_TIMEOUT_S, limits=_limits()))
+
+def _ollama_async_client() -> ollama.AsyncClient:
+    return _async_client("ollama", lambda: ollama.AsyncClient(timeout=LLM_TIMEOUT_S, limits=_limits()))
 
-    client = OpenAI(api_key=api_key)
+def _openai_client() -> OpenAI:
+    return _client("openai", lambda: OpenAI(
+        api_key=_openai_api_key(),
+        timeout=LLM_TIMEOUT_S,
+        http_client=DefaultHttpxClient(limits=_limits()),
+    ))
 
-    resp = client.chat.completions.create(
+def _openai_async_client() -> AsyncOpenAI:
+    return _async_client("openai", lambda: AsyncOpenAI(
+        api_key=_openai_api_key(),
+        timeout=LLM_TIMEOUT_S,
+        http_client=DefaultAsyncHttpxClient(limits=_limits()),
+    ))
+
+# get response from OpenAI model
+def _openai_chat(messages: List[Dict[str, str]], model: str) -> str:
+    resp = _openai_client().chat.completions.create(
         model=model,
         messages=messages,
     )
     content = resp.choices[0].message.content
     return content or ""
 
+async def _openai_chat_async(messages: List[Dict[str, str]], model: str) -> str:
+    resp = await _openai_async_client().chat.completions.create(
+        model=model,
+        messages=messages,
+    )
+    content = resp.choices[0].message.content
+    return content or ""
+
+# ----- local LLM prefix reuse -----
+# Ollama keeps a model loaded for keep_alive after each request (default 5m, then the next
+# caller pays the full load), and reuses its KV cache for the longest prefix a request
+# shares with the one before it, evaluating only the new tokens. Every session's context
+# starts with the same pinned system prompts (chat_history.ChatHistory), so with the model
+# kept resident that prefix is processed once instead of on every turn.
+# prompt_eval_count / prompt_eval_duration in each response are the tokens Ollama actually
+# evaluated and how long it took: they stay small while the prefix is reused.
+
+def _keep_alive(value: str):
+    # "30m", "1h" ... or a number of seconds ("-1" = keep loaded forever)
+    return int(value) if value.lstrip("-").isdigit() else value
+
+OLLAMA_KEEP_ALIVE = _keep_alive(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+
+_prefix_lock = threading.Lock()
+_PREFIX = {"requests": 0, "prompt_eval_count": 0, "prompt_eval_ms": 0.0, "load_ms": 0.0, "cold_loads": 0}
+_last_prefix: Dict[str, float] = {}
+
+def _ms(ns) -> float:
+    return (ns or 0) / 1e6
+
+def _record_prefix(response) -> None:
+    # final Ollama response (or last stream chunk) -> prefix processing counters
+    if not response or response.get("prompt_eval_count") is None:
+        return
+    count = response.get("prompt_eval_count") or 0
+    eval_ms = _ms(response.get("prompt_eval_duration"))
+    load_ms = _ms(response.get("load_duration"))
+    with _prefix_lock:
+        _PREFIX["requests"] += 1
+        _PREFIX["prompt_eval_count"] += count
+        _PREFIX["prompt_eval_ms"] += eval_ms
+        _PREFIX["load_ms"] += load_ms
+        if load_ms > 1000:  # model wasn't resident
+            _PREFIX["cold_loads"] += 1
+        _last_prefix.update(prompt_eval_count=count, prompt_eval_ms=round(eval_ms, 1), load_ms=round(load_ms, 1))
+
+def llm_prefix_stats() -> dict:
+    with _prefix_lock:
+        stats = dict(_PREFIX)
+        last = dict(_last_prefix)
+    n = stats["requests"]
+    return {
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "requests": n,
+        "cold_loads": stats["cold_loads"],
+        "avg_prompt_eval_count": round(stats["prompt_eval_count"] / n, 1) if n else 0.0,
+        "avg_prompt_eval_ms": round(stats["prompt_eval_ms"] / n, 1) if n else 0.0,
+        "avg_load_ms": round(stats["load_ms"] / n, 1) if n else 0.0,
+        "last": last,
+    }
+
+def _ollama_chat(messages: List[Dict[str, str]], model: str, **kwargs):
+    return _ollama_client().chat(model=model, messages=messages, keep_alive=OLLAMA_KEEP_ALIVE, **kwargs)
+
+def warm_ollama(model: str, prefix: List[Dict[str, str]]) -> None:
+    # Startup: load the model and evaluate the shared prefix once, so the first caller pays
+    # neither. Never raises: with Ollama down the app still answers through OpenAI.
+    if not (_prefer_ollama() and OLLAMA_HEALTH.available()):
+        print("[LLM] Ollama warm-up skipped (not reachable)")
+        return
+    try:
+        with OLLAMA_HEALTH.tracked():
+            response = _ollama_chat(prefix, model, options={"num_predict": 1})
+    except Exception as e:
+        print(f"[WARN] Ollama warm-up failed: {e}")
+        return
+    print(
+        f"[LLM] Ollama warm: {model} loaded in {_ms(response.get('load_duration')) / 1000:.1f}s, "
+        f"prefix {response.get('prompt_eval_count') or 0} tokens in {_ms(response.get('prompt_eval_duration')):.0f}ms"
+    )
+
+# ----- token streaming -----
+# With on_token, replies are generated with stream=True and every piece is handed to
+# on_token as it arrives (the web app cuts them into sentences for TTS, see
+# web_tts.SentenceChunker). The full reply is still returned and added to history.
+
+class _PartialReply(Exception):
+    # provider failed after some tokens were already handed out
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.text = text
+
+def _consume_tokens(tokens: Iterable[Optional[str]], on_token: Callable[[str], None]) -> str:
+    parts: List[str] = []
+    try:
+        for token in tokens:
+            if token:
+                parts.append(token)
+                on_token(token)
+    except Exception as e:
+        if parts:
+            raise _PartialReply("".join(parts)) from e
+        raise
+    return "".join(parts)
+
+def _ollama_reply(messages: List[Dict[str, str]], model: str, on_token=None) -> str:
+    if on_token is None:
+        response = _ollama_chat(messages, model)
+        _record_prefix(response)
+        return response["message"]["content"]
+
+    def tokens():
+        for chunk in _ollama_chat(messages, model, stream=True):
+            if chunk.get("done"):
+                _record_prefix(chunk)  # timings come on the last chunk
+            yield chunk["message"]["content"]
+
+    return _consume_tokens(tokens(), on_token)
+
+def _openai_reply(messages: List[Dict[str, str]], model: str, on_token=None) -> str:
+    if on_token is None:
+        return _openai_chat(messages, model)
+    stream = _openai_client().chat.completions.create(model=model, messages=messages, stream=True)
+    return _consume_tokens((chunk.choices[0].delta.content for chunk in stream if chunk.choices), on_token)
+
+def _context(chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    # What actually gets sent: a session's ChatHistory trims itself to its token budget
+    if isinstance(chat_history, ChatHistory):
+        return chat_history.for_llm()
+    return chat_history
+
+
 # main query function
 # Tries Ollama first if reachable. If Ollama is not reachable, uses OpenAI (gpt-4o-mini by default)
-def query_llm(prompt: str, chat_history: List[Dict[str, str]], model: str) -> str:
+# Reachability comes from the background health monitor (llm_health.py), so no probe per call
+def query_llm(
+    prompt: str,
+    chat_history: List[Dict[str, str]],
+    model: str,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
     # Add prompt to context window
     chat_history.append({"role": "user", "content": prompt})
+    messages = _context(chat_history)
 
-    # Decide provider
-    prefer_ollama = os.getenv("PREFER_OLLAMA", "true").lower() in ("1", "true", "yes", "y")
-    openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-
-    reply: str = ""
-
-    if prefer_ollama and _ollama_reachable():
+    reply = None
+    if _prefer_ollama() and OLLAMA_HEALTH.available():
         # Ollama path
         try:
-            response = ollama.chat(model=model, messages=chat_history)
-            reply = response["message"]["content"]
+            with OLLAMA_HEALTH.tracked():
+                reply = _ollama_reply(messages, model, on_token)
+        except _PartialReply as e:
+            # part of the reply is already out (being spoken): keep it, don't restart on OpenAI
+            print(f"[WARN] Ollama stream broke off: {e.__cause__}")
+            reply = e.text
         except Exception:
             # If Ollama fails mid-call, fall back to OpenAI
-            try:
-                reply = _openai_chat(chat_history, openai_model)
-            except Exception as e:
-                if _is_openai_insufficient_quota(e):
-                    reply = "Insufficient OpenAI Credits"
-                else:
-                    reply = "LLM backend error."
-    else:
+            pass
+
+    if reply is None:
         # OpenAI path
         try:
-            reply = _openai_chat(chat_history, openai_model)
+            reply = _openai_reply(messages, _openai_model(), on_token)
+        except _PartialReply as e:
+            print(f"[WARN] OpenAI stream broke off: {e.__cause__}")
+            reply = e.text
         except Exception as e:
-            if _is_openai_insufficient_quota(e):
-                reply = "Insufficient OpenAI Credits"
-            else:
-                reply = "LLM backend error."
+            reply = _fallback_reply(e)
+            if on_token is not None:
+                on_token(reply)  # error replies are spoken too
 
     # Add response to context window
     chat_history.append({"role": "assistant", "content": reply})
     return reply
 
 
+# Same as query_llm, for async endpoints: awaits the providers instead of blocking a thread
+async def query_llm_async(prompt: str, chat_history: List[Dict[str, str]], model: str) -> str:
+    chat_history.append({"role": "user", "content": prompt})
+    messages = _context(chat_history)
+
+    reply = None
+    if _prefer_ollama() and OLLAMA_HEALTH.available():
+        try:
+            # cancellation (client gone, task cancelled) isn't held against Ollama; it re-raises
+            with OLLAMA_HEALTH.tracked():
+                response = await _ollama_async_client().chat(
+                    model=model, messages=messages, keep_alive=OLLAMA_KEEP_ALIVE
+                )
+                _record_prefix(response)
+                reply = response["message"]["content"]
+        except Exception:
+            pass
+
+    if reply is None:
+        try:
+            reply = await _openai_chat_async(messages, _openai_model())
+        except Exception as e:
+            reply = _fallback_reply(e)
+
+    chat_history.append({"role": "assistant", "content": reply})
+    return reply
+
+
 # Backwards-compatible alias so I don't have to refactor everywhere
 def query_ollama(prompt: str, chat_history: List[Dict[str, str]], model: str) -> str:
     return query_llm(prompt, chat_history, model)
@@ -0,0 +1,196 @@
+# app/voice/llm_health.py
+
+"""
+Ollama health monitor + circuit breaker for query_llm.
+
+query_llm used to call ollama.list() before every chat, so each turn paid a round trip
+just to pick a provider, and with Ollama down it paid the probe AND a failed chat before
+falling back to OpenAI.
+
+- A background thread probes Ollama every `ttl_s` seconds (with its own short timeout)
+  and caches the result; the hot path only reads that flag.
+- Live chat failures feed a circuit breaker: after `failure_threshold` in a row the
+  circuit opens and every turn goes straight to OpenAI for `open_s` seconds. Then one
+  trial call is let through (half-open): success closes the circuit, failure re-opens it.
+  Callers wrap the Ollama call in `tracked()`. Errors count as failures; a call that is
+  cancelled (client hung up, task cancelled) says nothing about Ollama and isn't counted,
+  it only hands the half-open trial on to the next caller. A trial that never reports
+  back at all is given up on after `open_s` and the next caller becomes the trial.
+
+Probes only answer "is the server up"; the circuit catches a server that answers
+/api/tags but fails chats (model not pulled, out of memory, ...).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class OllamaHealth:
+
+    def __init__(
+        self,
+        probe: Callable[[], object],
+        ttl_s: float = 10.0,
+        failure_threshold: int = 3,
+        open_s: float = 30.0,
+    ):
+        self.probe = probe
+        self.ttl_s = ttl_s
+        self.failure_threshold = failure_threshold
+        self.open_s = open_s
+
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._pid: Optional[int] = None  # process the monitor thread runs in
+        self._stop = threading.Event()
+        self._reachable = False
+        self._last_probe: Optional[float] = None
+        self._state = CLOSED
+        self._failures = 0          # consecutive live-call failures
+        self._open_until = 0.0
+        self._trial_started = 0.0
+
+        # counters
+        self.probes = 0
+        self.probe_failures = 0
+        self.circuit_opens = 0
+        self.skipped = 0            # calls sent straight to the fallback
+
+    # ---------- probing ----------
+
+    def _probe_once(self) -> None:
+        try:
+            self.probe()
+            ok = True
+        except Exception:
+            ok = False
+        with self._lock:
+            self.probes += 1
+            self.probe_failures += 0 if ok else 1
+            if ok != self._reachable:
+                print(f"[LLM] Ollama {'reachable' if ok else 'unreachable'}")
+            self._reachable = ok
+            self._last_probe = time.monotonic()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.ttl_s):
+            self._probe_once()
+
+    def start(self) -> None:
+        # First probe runs here (startup), the rest in the background
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._probe_once()
+            self._stop.clear()
+            threading.Thread(target=self._loop, name="clinai-ollama-health", daemon=True).start()
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # ---------- hot path ----------
+
+    def available(self) -> bool:
+        # No I/O: cached reachability + circuit state
+        if self._pid != os.getpid():
+            self.start()  # first call (CLI), or first call in a forked worker
+        with self._lock:
+            allowed = self._reachable
+            now = time.monotonic()
+            if self._state == OPEN:
+                if allowed and now >= self._open_until:
+                    self._state = HALF_OPEN  # this caller is the trial
+                    self._trial_started = now
+                else:
+                    allowed = False
+            elif self._state == HALF_OPEN:
+                if allowed and now - self._trial_started >= self.open_s:
+                    self._trial_started = now  # trial never reported back: this caller is the new one
+                else:
+                    allowed = False  # trial already in flight
+            if not allowed:
+                self.skipped += 1
+            return allowed
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                print("[LLM] Ollama circuit closed")
+            self._failures = 0
+            self._state = CLOSED
+
+    @contextmanager
+    def tracked(self):
+        # Records the outcome of the call in the with-block. Exceptions are failures;
+        # cancellation and other BaseExceptions aren't counted. Both propagate.
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        else:
+            self.record_success()
+
+    def _release_trial(self) -> None:
+        # an aborted half-open trial: let the next caller try instead
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._state = OPEN
+                self._open_until = time.monotonic()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._open_until = time.monotonic() + self.open_s
+                self.circuit_opens += 1
+                print(f"[LLM] Ollama circuit open for {self.open_s:.0f}s after {self._failures} failures")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reachable": self._reachable,
+                "circuit": self._state,
+                "consecutive_failures": self._failures,
+                "circuit_opens": self.circuit_opens,
+                "skipped": self.skipped,
+                "probes": self.probes,
+                "probe_failures": self.probe_failures,
+                "last_probe_age_s": (
+                    round(time.monotonic() - self._last_probe, 1) if self._last_probe is not None else None
+                ),
+            }
+
+
+_probe_clients = {}  # pid -> client (only the monitor thread probes)
+
+
+def _ollama_probe() -> None:
+    # /api/tags with a short timeout, so a blackholed host can't stall the monitor for minutes
+    client = _probe_clients.get(os.getpid())
+    if client is None:
+        import ollama
+        client = _probe_clients[os.getpid()] = ollama.Client(timeout=float(os.getenv("OLLAMA_PROBE_TIMEOUT_S", "2")))
+    client.list()
+
+
+OLLAMA_HEALTH = OllamaHealth(
+    _ollama_probe,
+    ttl_s=float(os.getenv("OLLAMA_HEALTH_TTL_S", "10")),
+    failure_threshold=int(os.getenv("OLLAMA_CIRCUIT_FAILURES", "3")),
+    open_s=float(os.getenv("OLLAMA_CIRCUIT_OPEN_S", "30")),
+)
+
+
+def llm_health_stats() -> dict:
+    return OLLAMA_HEALTH.stats()
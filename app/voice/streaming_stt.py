@@ -0,0 +1,181 @@
+"""
+app/voice/streaming_stt.py
+
+Incremental speech recognition for the /voice_stream WebSocket.
+
+The browser sends raw 16 kHz mono PCM16 frames while the caller is talking, instead
+of one WebM blob after they stop. StreamingRecognizer:
+
+- tracks speech with the same energy gate as transcriber.py (rms_int16)
+- re-decodes the growing utterance every `partial_interval_s` and reports partial text
+  (skipped whenever Whisper requests are already queued)
+- starts a speculative final decode as soon as the caller goes quiet, so by the time
+  the endpoint (`endpoint_ms` of silence) is confirmed the transcript is usually done
+- throws the speculative decode away if the caller starts talking again
+
+The final transcript goes through gate_transcript like every other STT path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.voice.stt_profiles import STTProfile
+from app.voice.stt_service import (SAMPLE_RATE, STT_POOL, STTBusyError, Transcription, gate_transcript,
+    pool_for, transcribe)
+from app.voice.vad import pcm16_to_float32, rms_int16
+
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2  # int16 mono
+
+Event = Tuple[str, str]  # ("partial" | "final", text)
+
+
+def _discard_result(task: asyncio.Task) -> None:
+    # keeps abandoned decodes from logging "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class StreamingRecognizer:
+
+    def __init__(
+        self,
+        min_conf: float = -0.70,
+        profile: Optional[STTProfile] = None,
+        rms_threshold: float = 200,       # same as listen_and_transcribe_whisper
+        speculative_ms: int = 250,        # silence before a speculative final decode
+        endpoint_ms: int = 700,           # silence that ends the utterance
+        partial_interval_s: float = 1.0,  # new speech between partial decodes
+        max_utterance_s: float = 15.0,    # hard max, transcribe anyway
+        max_wait_s: float = 10.0,         # no speech at all -> final ""
+    ):
+        self.min_conf = min_conf
+        self.profile = profile
+        self.rms_threshold = rms_threshold
+        self.speculative_frames = speculative_ms // FRAME_MS
+        self.endpoint_frames = endpoint_ms // FRAME_MS
+        self.partial_interval_bytes = int(partial_interval_s * SAMPLE_RATE) * 2
+        self.max_utterance_bytes = int(max_utterance_s * SAMPLE_RATE) * 2
+        self.max_wait_frames = int(max_wait_s * 1000) // FRAME_MS
+
+        self._pending = b""               # bytes that don't fill a whole frame yet
+        self.reset()
+
+    def reset(self) -> None:
+        # ready for the next utterance
+        self._buffer = bytearray()
+        self._started = False
+        self._idle_frames = 0
+        self._silence_frames = 0
+        self._speculative: Optional[asyncio.Task] = None
+        self._partial: Optional[asyncio.Task] = None
+        self._partial_at = 0
+
+    def close(self) -> None:
+        for task in (self._speculative, self._partial):
+            if task is not None:
+                task.add_done_callback(_discard_result)
+        self._speculative = self._partial = None
+
+    # ---------- ingest ----------
+
+    async def feed(self, data: bytes) -> List[Event]:
+        # Append PCM16 bytes (any length); returns partial/final events in order
+        events: List[Event] = []
+        data = self._pending + data
+        usable = len(data) - len(data) % FRAME_BYTES
+        self._pending = data[usable:]
+
+        for i in range(0, usable, FRAME_BYTES):
+            final = await self._on_frame(data[i:i + FRAME_BYTES], events)
+            if final is not None:
+                events.append(("final", final))
+                # whatever follows the endpoint belongs to the next turn: keep it for the
+                # next feed() (with the partial frame already in _pending)
+                self._pending = data[i + FRAME_BYTES:]
+                break
+        return events
+
+    async def flush(self) -> List[Event]:
+        # Client says the caller is done (e.g. stop button): finish now
+        self._pending = b""
+        return [("final", await self._finish())]
+
+    async def _on_frame(self, frame: bytes, events: List[Event]) -> Optional[str]:
+        voiced = rms_int16(frame) >= self.rms_threshold
+
+        if not self._started:
+            if not voiced:
+                self._idle_frames += 1
+                if self._idle_frames >= self.max_wait_frames:
+                    self.reset()
+                    return ""
+                return None
+            self._started = True
+
+        self._buffer.extend(frame)
+
+        if voiced:
+            self._silence_frames = 0
+            if self._speculative is not None:
+                # caller kept talking, the speculative decode is stale
+                self._speculative.add_done_callback(_discard_result)
+                self._speculative = None
+        else:
+            self._silence_frames += 1
+
+        self._collect_partial(events)
+
+        if self._silence_frames >= self.endpoint_frames or len(self._buffer) >= self.max_utterance_bytes:
+            return await self._finish()
+
+        if self._silence_frames >= self.speculative_frames and self._speculative is None:
+            self._speculative = self._decode()
+        elif voiced and len(self._buffer) - self._partial_at >= self.partial_interval_bytes:
+            self._start_partial()
+        return None
+
+    # ---------- decoding ----------
+
+    def _decode(self) -> asyncio.Task:
+        audio = pcm16_to_float32(bytes(self._buffer))
+        return asyncio.create_task(transcribe(audio, self.profile))
+
+    def _start_partial(self) -> None:
+        self._partial_at = len(self._buffer)
+        # partials are a nicety: never add to a Whisper queue that's already backed up
+        pool = STT_POOL if self.profile is None else pool_for(self.profile)
+        if self._partial is None and pool.waiting == 0:
+            self._partial = self._decode()
+
+    def _collect_partial(self, events: List[Event]) -> None:
+        task = self._partial
+        if task is None or not task.done():
+            return
+        self._partial = None
+        if not task.cancelled() and task.exception() is None and task.result().text:
+            events.append(("partial", task.result().text))
+
+    async def _finish(self) -> str:
+        if not self._started:
+            self.reset()
+            return ""
+
+        # speculative decode covers everything but trailing silence -> reuse it
+        task = self._speculative or self._decode()
+        self._speculative = None
+        if self._partial is not None:
+            self._partial.add_done_callback(_discard_result)
+            self._partial = None
+        try:
+            result: Transcription = await task
+        except STTBusyError:
+            raise
+        except Exception as e:
+            print("[STT] Whisper error in streaming recognizer:", e)
+            return ""
+        finally:
+            self.reset()
+        return gate_transcript(result.text, result.avg_conf, self.min_conf)
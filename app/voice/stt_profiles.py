@@ -0,0 +1,131 @@
+"""
+app/voice/stt_profiles.py
+
+Named Whisper decode profiles and the policy that picks one per utterance.
+
+A profile fixes the model (size + compute_type) and how it decodes (beam size,
+temperature fallback, condition_on_previous_text). The web app picks one for every
+upload from what the agent just asked and how backed up the STT queue is:
+
+- drug names (refill_state == "drug_name"): "accurate", beam search + a narrower
+  temperature fallback, because a misheard medication costs a whole extra turn. It runs
+  on the web model unless STT_ACCURATE_MODEL names a bigger one (e.g. "small"), which
+  is then loaded as a second model (opt-in: it costs its own RAM)
+- yes/no confirmations: "fast", greedy with no fallback, one or two words is easy
+- anything else: "balanced", the original web settings
+- once `degrade_queue` requests are waiting on the chosen profile's own pool, it steps
+  down one tier
+
+While a drug name is expected, the chosen profile also gets the formulary as
+an initial prompt (with_vocabulary), so Whisper leans toward "lisinopril"
+instead of "listen, April".
+
+The confidence gate (min_conf) is applied the same way whichever profile ran.
+The CLI (conversation_loop.py) picks its single profile with STT_CLI_PROFILE.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WEB_MODEL = os.getenv("STT_MODEL", "base")
+WEB_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")
+WEB_DEVICE = os.getenv("STT_DEVICE", "cpu")
+
+# faster-whisper's default fallback schedule
+FULL_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+@dataclass(frozen=True)
+class STTProfile:
+    name: str
+    model_size: str
+    compute_type: str = WEB_COMPUTE_TYPE
+    device: str = WEB_DEVICE
+    beam_size: int = 1
+    temperature: Tuple[float, ...] = FULL_FALLBACK
+    condition_on_previous_text: bool = True
+    # hook for extra WhisperModel.transcribe kwargs
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def with_vocabulary(self, words: List[str], label: str) -> "STTProfile":
+        # Bias decoding toward known words (e.g. the refill formulary) via the initial prompt.
+        # Not hotwords too: faster-whisper puts both in the 224-token prompt, so the list
+        # would appear twice and crowd out the rest.
+        return replace(self, extra={
+            **self.extra,
+            "initial_prompt": f"{label}: {', '.join(words)}.",
+        })
+
+    def decode_options(self) -> Dict[str, Any]:
+        return {
+            "beam_size": self.beam_size,
+            "temperature": list(self.temperature),
+            "condition_on_previous_text": self.condition_on_previous_text,
+            **self.extra,
+        }
+
+
+PROFILES: Dict[str, STTProfile] = {
+    "fast": STTProfile(
+        "fast", WEB_MODEL, beam_size=1, temperature=(0.0,), condition_on_previous_text=False,
+    ),
+    "balanced": STTProfile(
+        "balanced", WEB_MODEL, beam_size=1,
+    ),
+    "accurate": STTProfile(
+        "accurate", os.getenv("STT_ACCURATE_MODEL", WEB_MODEL), beam_size=5,
+        temperature=(0.0, 0.2, 0.4), condition_on_previous_text=False,
+    ),
+    # conversation_loop.py on a local GPU
+    "cli": STTProfile(
+        "cli", "large-v3", compute_type="float16", device="cuda", beam_size=1,
+    ),
+}
+
+# one step down when the queue backs up
+_DEGRADE = {"accurate": "balanced", "balanced": "fast", "fast": "fast"}
+
+# STT_ADAPTIVE=false always uses the balanced profile (the old fixed settings)
+STT_ADAPTIVE = os.getenv("STT_ADAPTIVE", "true").lower() in ("1", "true", "yes", "y")
+STT_DEGRADE_QUEUE = int(os.getenv("STT_DEGRADE_QUEUE", "2"))
+# STT_DRUG_HOTWORDS=false turns off formulary biasing (to compare re-prompt rates)
+STT_DRUG_HOTWORDS = os.getenv("STT_DRUG_HOTWORDS", "true").lower() in ("1", "true", "yes", "y")
+
+# counters for /metrics
+profile_counts: Dict[str, int] = {name: 0 for name in PROFILES}
+degraded = 0
+
+
+def choose_profile(context: Optional[str], queue_depth: Callable[[STTProfile], int]) -> STTProfile:
+    # context: "drug_name" | "confirmation" | None (open question)
+    # queue_depth(profile): requests waiting on the pool that profile runs on
+    global degraded
+    if not STT_ADAPTIVE:
+        name = "balanced"
+    else:
+        if context == "drug_name":
+            name = "accurate"
+        elif context == "confirmation":
+            name = "fast"
+        else:
+            name = "balanced"
+
+        if _DEGRADE[name] != name and queue_depth(PROFILES[name]) >= STT_DEGRADE_QUEUE:
+            name = _DEGRADE[name]
+            degraded += 1
+
+    profile_counts[name] += 1
+    return PROFILES[name]
+
+
+def profile_stats() -> Dict[str, Any]:
+    return {
+        "adaptive": STT_ADAPTIVE,
+        "degrade_queue": STT_DEGRADE_QUEUE,
+        "chosen": dict(profile_counts),
+        "degraded": degraded,
+        "drug_hotwords": STT_DRUG_HOTWORDS,
+    }
@@ -0,0 +1,482 @@
+"""
+app/voice/stt_service.py
+
+Whisper speech-to-text service for the web app (transcriber.py covers conversation_loop.py).
+
+- WhisperPool: one faster-whisper model with `replicas` CTranslate2 workers
+  (num_workers), each using `cpu_threads` cores, driven by a thread pool of the same
+  size, so several callers speaking at once are transcribed in parallel.
+- Bounded request queue: callers wait at most `queue_timeout` seconds for a free
+  replica, and are rejected right away with STTBusyError once `max_queue` are waiting.
+- Every request reports its queue and run time, and aggregates go to /metrics.
+- BatchScheduler (opt-in): collects utterances from different callers for a few
+  hundred ms and runs them through Whisper as one batch.
+- pool_for: one pool per model in use, so decode profiles (stt_profiles.py) that need
+  a bigger model get their own.
+- gate_transcript: the confidence gate shared by every transcription path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from app.services.model_bundle import resolve_whisper  # before faster_whisper: may set HF_HUB_OFFLINE
+from faster_whisper import WhisperModel
+from faster_whisper.audio import pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+
+from app.voice.stt_profiles import STTProfile
+
+SAMPLE_RATE = 16000
+N_SAMPLES = 30 * SAMPLE_RATE  # one Whisper window
+N_FRAMES = 3000               # mel frames in one window
+INAUDIBLE = "[Inaudible Message]"
+
+
+class STTBusyError(RuntimeError):
+    pass
+
+
+@dataclass
+class Transcription:
+    text: str
+    avg_conf: float
+    audio_s: float
+    queue_ms: float = 0.0
+    run_ms: float = 0.0
+
+
+def _seg_conf(seg):
+    # prefer avg_logprob / avg_log_prob
+    return getattr(seg, "avg_logprob", getattr(seg, "avg_log_prob", -10.0))
+
+# return avg confidence score for transcribed text
+def _avg_conf_and_text(segments):
+    segs = list(segments)
+    if not segs:
+        return -10.0, ""
+    text = " ".join(s.text.strip() for s in segs).strip()
+    conf = sum(_seg_conf(s) for s in segs) / max(len(segs), 1)
+    return conf, text
+
+# apply confidence gating logic
+def gate_transcript(text: str, avg_conf: float, min_conf: float = -0.70) -> str:
+    if not text:
+        return ""
+
+    # adjust confidence score for prompts with less words
+    word_count = len(text.split())
+    if word_count < 3:
+        adj_conf = avg_conf + 0.40
+    elif word_count == 3:
+        adj_conf = avg_conf + 0.35
+    else:
+        adj_conf = avg_conf
+
+    print(f"[STT] text={text!r} avg_conf={avg_conf:.2f} adj_conf={adj_conf:.2f}")
+    # return inaudible note if conf threshold not met
+    if adj_conf < min_conf:
+        return INAUDIBLE
+    return text
+
+
+class WhisperPool:
+
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        replicas: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+        max_queue: int = 16,
+        queue_timeout: float = 10.0,
+    ):
+        cores = os.cpu_count() or 1
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        # default: one replica per 2 cores (max 4), cores split evenly between them
+        self.replicas = replicas or min(4, max(1, cores // 2))
+        self.cpu_threads = cpu_threads or max(1, cores // self.replicas)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.model: Optional[WhisperModel] = None
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.replicas, thread_name_prefix="clinai-stt")
+        self._slots = asyncio.Semaphore(self.replicas)
+        self._waiting = 0
+
+        # counters
+        self._stats_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.max_waiting = 0
+        self._total_queue_ms = 0.0
+        self._total_run_ms = 0.0
+        self._total_audio_s = 0.0
+
+    def load(self) -> WhisperModel:
+        with self._load_lock:
+            if self.model is None:
+                print(
+                    f"[ClinAI-Web] Loading Whisper model '{self.model_size}' "
+                    f"({self.replicas} replicas x {self.cpu_threads} threads)..."
+                )
+                self.model = WhisperModel(
+                    resolve_whisper(self.model_size),  # pinned local copy when bundled
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.replicas,
+                )
+            return self.model
+
+    def warmup(self) -> None:
+        # one second of silence: first decode allocates CTranslate2 buffers (not counted in stats)
+        self._run(np.zeros(SAMPLE_RATE, dtype=np.float32), {})
+
+    @property
+    def waiting(self) -> int:
+        # requests queued for a replica right now
+        return self._waiting
+
+    # ---------- inference ----------
+
+    def _run(self, audio: np.ndarray, options: Dict[str, Any]):
+        model = self.load()
+        started = time.perf_counter()
+        segments_iter, _ = model.transcribe(
+            audio,
+            language="en",
+            beam_size=options.pop("beam_size", 1),
+            word_timestamps=False,
+            **options,
+        )
+        segments = list(segments_iter)  # decoding happens while iterating
+        avg_conf, text = _avg_conf_and_text(segments)
+        return text, avg_conf, 1000 * (time.perf_counter() - started)
+
+    def _run_batch(self, audios: List[np.ndarray]):
+        # Several <= 30 s utterances through one encoder + decoder pass (greedy, no timestamps),
+        # the same way faster-whisper's BatchedInferencePipeline decodes its chunks
+        model = self.load()
+        started = time.perf_counter()
+
+        features = np.stack([
+            pad_or_trim(model.feature_extractor(audio), N_FRAMES) for audio in audios
+        ])
+        tokenizer = Tokenizer(
+            model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language="en"
+        )
+        prompt = model.get_prompt(tokenizer, previous_tokens=[], without_timestamps=True)
+        encoder_output = model.encode(features)
+        results = model.model.generate(
+            encoder_output,
+            [prompt] * len(audios),
+            beam_size=1,
+            max_length=model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+        )
+
+        outputs = []
+        for result in results:
+            tokens = [t for t in result.sequences_ids[0] if t < tokenizer.eot]
+            seq_len = len(result.sequences_ids[0])
+            avg_conf = result.scores[0] * seq_len / (seq_len + 1)  # cum_logprob / (len + 1)
+            text = tokenizer.decode(tokens).strip()
+            # Whisper's own silence rule
+            if result.no_speech_prob > 0.6 and avg_conf < -1.0:
+                text, avg_conf = "", -10.0
+            outputs.append((text, avg_conf))
+        return outputs, 1000 * (time.perf_counter() - started)
+
+    async def _acquire(self) -> float:
+        # Bounded queue -> free replica; returns the time spent waiting (ms)
+        if self._waiting >= self.max_queue:
+            with self._stats_lock:
+                self.rejected += 1
+            raise STTBusyError("STT queue is full")
+
+        enqueued = time.perf_counter()
+        self._waiting += 1
+        self.max_waiting = max(self.max_waiting, self._waiting)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise STTBusyError("timed out waiting for a Whisper replica")
+        finally:
+            self._waiting -= 1
+        return 1000 * (time.perf_counter() - enqueued)
+
+    def _record(self, queue_ms: float, run_ms: float, audio_s: float) -> None:
+        with self._stats_lock:
+            self.completed += 1
+            self._total_queue_ms += queue_ms
+            self._total_run_ms += run_ms
+            self._total_audio_s += audio_s
+
+    async def transcribe(self, audio: np.ndarray, **options: Any) -> Transcription:
+        # Bounded queue -> free replica -> Whisper on a worker thread
+        queue_ms = await self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            text, avg_conf, run_ms = await loop.run_in_executor(
+                self._executor, self._run, audio, dict(options)
+            )
+        except Exception:
+            with self._stats_lock:
+                self.failed += 1
+            raise
+        finally:
+            self._slots.release()
+
+        audio_s = len(audio) / SAMPLE_RATE
+        self._record(queue_ms, run_ms, audio_s)
+
+        print(f"[STT] audio={audio_s:.1f}s queue={queue_ms:.0f}ms run={run_ms:.0f}ms")
+        return Transcription(text=text, avg_conf=avg_conf, audio_s=audio_s, queue_ms=queue_ms, run_ms=run_ms)
+
+    async def transcribe_batch(self, audios: List[np.ndarray]) -> List[Transcription]:
+        # One replica, one forward pass for the whole batch
+        queue_ms = await self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            outputs, run_ms = await loop.run_in_executor(self._executor, self._run_batch, audios)
+        except Exception:
+            with self._stats_lock:
+                self.failed += 1
+            raise
+        finally:
+            self._slots.release()
+
+        audio_s = sum(len(a) for a in audios) / SAMPLE_RATE
+        self._record(queue_ms, run_ms, audio_s)
+
+        print(f"[STT] batch={len(audios)} audio={audio_s:.1f}s queue={queue_ms:.0f}ms run={run_ms:.0f}ms")
+        return [
+            Transcription(text=text, avg_conf=avg_conf, audio_s=len(a) / SAMPLE_RATE, queue_ms=queue_ms, run_ms=run_ms)
+            for a, (text, avg_conf) in zip(audios, outputs)
+        ]
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            n = self.completed
+            return {
+                "model": self.model_size,
+                "loaded": self.model is not None,
+                "replicas": self.replicas,
+                "cpu_threads": self.cpu_threads,
+                "waiting": self._waiting,
+                "max_waiting": self.max_waiting,
+                "completed": n,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_queue_ms": round(self._total_queue_ms / n, 1) if n else 0.0,
+                "avg_run_ms": round(self._total_run_ms / n, 1) if n else 0.0,
+                # < 1.0 means faster than real time
+                "real_time_factor": round(self._total_run_ms / 1000 / self._total_audio_s, 3) if self._total_audio_s else 0.0,
+            }
+
+
+# what WhisperPool._run_batch decodes with: greedy, a single temperature, no prompt
+BATCH_DECODE_OPTIONS: Dict[str, Any] = {"beam_size": 1, "temperature": [0.0], "condition_on_previous_text": False}
+
+
+@dataclass
+class _PendingUtterance:
+    audio: np.ndarray
+    future: asyncio.Future
+    enqueued: float
+
+
+class BatchScheduler:
+    """
+    Opt-in cross-session micro-batching (STT_BATCHING=true).
+
+    Utterances that arrive within `window_ms` of each other (up to `max_batch`) are
+    transcribed together by WhisperPool.transcribe_batch, then each result is handed
+    back to its own request, which applies the usual confidence gate.
+    Utterances longer than one 30 s Whisper window go through the normal path, with the
+    same (BATCH_DECODE_OPTIONS) settings.
+    """
+
+    def __init__(self, pool: WhisperPool, window_ms: float = 150, max_batch: int = 8):
+        self.pool = pool
+        self.window_s = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[_PendingUtterance] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()  # the loop only keeps weak references
+
+        # counters
+        self.batches = 0
+        self.batched_utterances = 0
+        self.largest_batch = 0
+
+    async def transcribe(self, audio: np.ndarray) -> Transcription:
+        if len(audio) > N_SAMPLES:
+            return await self.pool.transcribe(audio, **BATCH_DECODE_OPTIONS)
+
+        loop = asyncio.get_running_loop()
+        item = _PendingUtterance(audio, loop.create_future(), time.perf_counter())
+        self._pending.append(item)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+
+        return await item.future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            # leftovers start their own window
+            self._timer = asyncio.get_running_loop().call_later(self.window_s, self._flush)
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[_PendingUtterance]) -> None:
+        self.batches += 1
+        self.batched_utterances += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        try:
+            results = await self.pool.transcribe_batch([item.audio for item in batch])
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        done = time.perf_counter()
+        for item, result in zip(batch, results):
+            # queue time as seen by this request: batching window + wait for a replica
+            result.queue_ms = 1000 * (done - item.enqueued) - result.run_ms
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "window_ms": round(self.window_s * 1000),
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_utterances / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+STT_POOL = WhisperPool(
+    model_size=os.getenv("STT_MODEL", "base"),
+    device=os.getenv("STT_DEVICE", "cpu"),
+    compute_type=os.getenv("STT_COMPUTE_TYPE", "int8"),
+    replicas=_env_int("STT_REPLICAS"),
+    cpu_threads=_env_int("STT_CPU_THREADS"),
+    max_queue=int(os.getenv("STT_MAX_QUEUE", "16")),
+    queue_timeout=float(os.getenv("STT_QUEUE_TIMEOUT", "10")),
+)
+
+
+STT_BATCHER = (
+    BatchScheduler(
+        STT_POOL,
+        window_ms=float(os.getenv("STT_BATCH_WINDOW_MS", "150")),
+        max_batch=int(os.getenv("STT_BATCH_MAX", "8")),
+    )
+    if os.getenv("STT_BATCHING", "false").lower() in ("1", "true", "yes", "y")
+    else None
+)
+
+
+def stt_batching_stats() -> Dict[str, Any]:
+    return STT_BATCHER.stats() if STT_BATCHER is not None else {"enabled": False}
+
+
+# (model_size, compute_type, device) -> pool; profiles on the web model share STT_POOL
+_POOLS: Dict[Tuple[str, str, str], WhisperPool] = {
+    (STT_POOL.model_size, STT_POOL.compute_type, STT_POOL.device): STT_POOL,
+}
+
+
+def pool_for(profile: STTProfile) -> WhisperPool:
+    key = (profile.model_size, profile.compute_type, profile.device)
+    pool = _POOLS.get(key)
+    if pool is None:
+        # extra tiers get a single replica so they don't take cores from the main pool
+        pool = WhisperPool(
+            model_size=profile.model_size,
+            device=profile.device,
+            compute_type=profile.compute_type,
+            replicas=1,
+            cpu_threads=STT_POOL.cpu_threads,
+            max_queue=STT_POOL.max_queue,
+            queue_timeout=STT_POOL.queue_timeout,
+        )
+        _POOLS[key] = pool
+    return pool
+
+
+def stt_pool_stats() -> List[Dict[str, Any]]:
+    return [pool.stats() for pool in _POOLS.values()]
+
+
+def _batchable(profile: Optional[STTProfile]) -> bool:
+    # only batch when batching wouldn't change how it decodes (no profile = faster-whisper's
+    # defaults, with temperature fallback and conditioning: not batched either)
+    return profile is not None and profile.decode_options() == BATCH_DECODE_OPTIONS
+
+
+async def transcribe(audio: np.ndarray, profile: Optional[STTProfile] = None) -> Transcription:
+    pool = STT_POOL if profile is None else pool_for(profile)
+    # with STT_BATCHING on, profiles on the main model whose decode options match the
+    # batched decode go through the batcher; beam search, fallback or hints run alone
+    if STT_BATCHER is not None and pool is STT_POOL and _batchable(profile):
+        return await STT_BATCHER.transcribe(audio)
+    if profile is None:
+        return await pool.transcribe(audio)
+    return await pool.transcribe(audio, **profile.decode_options())
+
+
+async def transcribe_with_gate(
+    audio: np.ndarray,
+    min_conf: float = -0.70,
+    profile: Optional[STTProfile] = None,
+) -> str:
+    # Whisper + confidence gate; STTBusyError is left for the endpoint to turn into a 503
+    try:
+        result = await transcribe(audio, profile)
+    except STTBusyError:
+        raise
+    except Exception as e:
+        print("[STT] Whisper error in web app:", e)
+        return ""
+    return gate_transcript(result.text, result.avg_conf, min_conf)
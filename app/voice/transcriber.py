@@ -15,6 +15,8 @@ import numpy as np
 import re
 import time
 
+from app.voice.vad import rms_int16
+
 # This implementation is for conversation_loop.py, not the web app
 
 # Open mic stream and push audio into a queue
@@ -34,14 +36,6 @@ def start_microphone(sample_rate: int = 16000, blocksize: int = 4000):
     return q, stream
 
 # Helpers
-def rms_int16(buf_bytes: bytes) -> float:
-    # Quick RMS volume check to tell if someone’s talking
-    
-    a = np.frombuffer(buf_bytes, dtype=np.int16)
-    if a.size == 0:
-        return 0.0
-    return float(np.sqrt(np.mean((a.astype(np.float32))**2)))
-
 def _pcm_bytes_to_float32(buf_bytes: bytes) -> np.ndarray:
     # Whisper wants float32 [-1, 1], but the mic gives us int16.
     
@@ -72,6 +66,7 @@ def listen_and_transcribe_whisper(
     max_buffer_seconds=10,   # hard max, ~10 sec of speech
     max_wait_seconds=10,     # hard timeout
     min_conf=-0.60,          # minimum confidence threshold
+    decode_options=None,     # beam_size / temperature / ... from an STTProfile
 ):
     import time
     import traceback
@@ -110,8 +105,8 @@ def listen_and_transcribe_whisper(
             segments_iter, info = model.transcribe(
                 audio_f32,
                 language="en",
-                beam_size=1,
                 word_timestamps=False,
+                **(decode_options or {"beam_size": 1}),
             )
             # force materialization in case it's a generator
             segments = list(segments_iter)
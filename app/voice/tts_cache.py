@@ -0,0 +1,177 @@
+"""
+app/voice/tts_cache.py
+
+Content-addressed cache for synthesized agent audio.
+
+Most agent lines are fixed strings, so the same (voice, rate, text) gets synthesized
+over and over. Clips are keyed by a hash of those three values and kept in:
+
+- an LRU memory tier (bounded by total bytes)
+- an on-disk tier (bounded by total bytes, oldest files evicted first)
+
+Hit/miss counters are exposed through /metrics.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class TTSCache:
+
+    def __init__(self, memory_max_bytes: int, disk_dir: Optional[str], disk_max_bytes: int):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+
+        # counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*.mp3"))
+
+    @staticmethod
+    def key(voice: str, rate: str, text: str) -> str:
+        return hashlib.sha256(f"{voice}\x1f{rate}\x1f{text.strip()}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.mp3"
+
+    # ---------- lookups ----------
+
+    def get(self, voice: str, rate: str, text: str) -> Optional[bytes]:
+        key = self.key(voice, rate, text)
+
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                audio = path.read_bytes()
+                os.utime(path)  # keeps recently used files out of disk eviction
+            except OSError:
+                audio = None
+            if audio:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, audio)
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, voice: str, rate: str, text: str, audio: bytes) -> None:
+        if not audio:
+            return
+        key = self.key(voice, rate, text)
+
+        with self._lock:
+            self.stores += 1
+            self._remember(key, audio)
+
+        if self.disk_dir:
+            self._write_disk(key, audio)
+
+    # ---------- tiers ----------
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        # memory tier (caller holds the lock)
+        if len(audio) > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.memory_evictions += 1
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        path = self._disk_path(key)
+        if path.exists():
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)  # atomic, readers never see half a clip
+        except OSError as e:
+            print(f"[WARN] TTS cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(audio)
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # drop least recently used files until we're back under 90% of the budget
+        files = []
+        for p in self.disk_dir.glob("*/*.mp3"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        evicted = 0
+        for _, size, p in files:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self.disk_evictions += evicted
+
+    # ---------- metrics ----------
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+            }
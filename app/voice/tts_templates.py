@@ -0,0 +1,195 @@
+"""
+app/voice/tts_templates.py
+
+Template TTS for personalized prompts.
+
+Lines like "Are you still there, {first_name}?" or the date/time confirmations only
+differ by a name, date, time or medication, so the full sentence misses the TTS cache
+every time. In template mode (TTS_TEMPLATE_MODE=true) a sentence that matches one of
+the templates below is planned as separate pieces:
+
+    "To confirm, you'd like to schedule your appointment for" | "November 11th" | "at 10:00am" | ", is that correct?"
+
+A short lead-in before a name rides with it, along with the punctuation after it, so the
+greeting is "Hi Christopher," | "I'm Ava. How can I assist you today?" instead of one-word
+clips with seams between them.
+
+Fixed pieces are prewarmed once, slot values (dates, times, meds) come from small
+domains and are prewarmed too, so only names are ever synthesized live. The MP3 pieces
+are concatenated back in order like any other plan.
+"""
+
+from __future__ import annotations
+
+import calendar
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TTS_TEMPLATE_MODE = os.getenv("TTS_TEMPLATE_MODE", "false").lower() in ("1", "true", "yes", "y")
+
+# slot type -> regex for the values handle_turn actually renders
+_MONTHS = "|".join(calendar.month_name[1:])
+_SLOT_PATTERNS = {
+    "name": r"[^,.!?]{1,40}?",
+    "date": rf"(?:{_MONTHS}) \d{{1,2}}(?:st|nd|rd|th)",         # ap.prettify_date
+    "time": r"\d{1,2}:\d{2}(?:am|pm)?",                          # ap.format_appt_time (+ am/pm)
+    "at_time": r"at \d{1,2}:\d{2}(?:am|pm)?",                    # "at" rides along so no tiny clip
+    "med": r"[A-Za-z][A-Za-z \-]{1,40}?",                        # rx_refills.MEDS
+}
+_SLOT = re.compile(r"\{(\w+)\}")
+_PUNCT_ONLY = re.compile(r"^[\s,.!?]*$")
+_LEADING_PUNCT = re.compile(r"^\s*([,.!?]*)\s*")
+# fixed text before a name shorter than this ("Hi") is spoken in the same clip as the name
+_NAME_LEAD_IN_CHARS = 12
+
+# Matched against whole sentences (or runs of them, like the greeting) before
+# web_tts merges short sentences, so where that merge cuts never decides a match
+TEMPLATES = [
+    "Hi {name}, I'm Ava. How can I assist you today?",
+    "Are you still there, {name}?",
+    "Was your query resolved today, {name}?",
+    "To confirm, you'd like to schedule your appointment for {date} {at_time}, is that correct?",
+    "Can you confirm that you'd like to schedule your appointment on {date} {at_time}?",
+    "Please confirm, does {time} work for you?",
+    "Let me check our availability for {date}.",
+    "Sorry, we are fully booked for {date}.",
+    "We have full availability on {date}.",
+    "Sorry, {time} is already booked for {date}.",
+    "Would you still like to cancel your appointment for {date} {at_time}?",
+    "To confirm, you would like to cancel your appointment for {date} {at_time}.",
+    "You have one appointment for {date} {at_time}, would you like to cancel that?",
+    "{date} {at_time} does not match up with any existing appointments for you in our system.",
+    "Our database is showing that you do not have any scheduled appointments for {date}.",
+    "Let's handle these one at a time starting with the appointment for {date}.",
+    "To confirm, you would like a refill for {med}, right?",
+    "To confirm, you would like a refill for {med}?",
+    "Would you like a refill for {med}?",
+]
+
+# Fixed sentences that only ever appear next to a personalized one
+COMMON_SENTENCES = [
+    "Sorry, I didn't catch your answer.",
+    "The conversation has ended.",
+    "Okay, let's update that.",
+    "Please try a different day.",
+    "Please try a different date.",
+    "Please choose any appointment time you'd like from 8:00am to 4:30pm, on the hour or half hour.",
+    "Please choose any appointment time you'd like from 8:00am to 3:30pm, on the hour or half hour.",
+    "Please try repeating the date and time of the appointment you would like to cancel.",
+]
+
+
+class PromptTemplate:
+
+    def __init__(self, template: str):
+        self.template = template
+        self.parts: List[Tuple[str, str]] = []  # ("fixed", text) | ("slot", slot type)
+
+        pattern = ""
+        pos = 0
+        for m in _SLOT.finditer(template):
+            fixed = template[pos:m.start()]
+            if fixed:
+                self.parts.append(("fixed", fixed))
+                pattern += re.escape(fixed)
+            slot_type = m.group(1)
+            pattern += f"(?P<s{len(self.parts)}>{_SLOT_PATTERNS[slot_type]})"
+            self.parts.append(("slot", slot_type))
+            pos = m.end()
+        if template[pos:]:
+            self.parts.append(("fixed", template[pos:]))
+            pattern += re.escape(template[pos:])
+
+        self.regex = re.compile(pattern)
+
+    def _slot_suffix(self, idx: int) -> str:
+        # punctuation-only glue after a slot: keep "?" (question intonation), drop "." / ","
+        if idx + 1 < len(self.parts):
+            kind, text = self.parts[idx + 1]
+            if kind == "fixed" and _PUNCT_ONLY.match(text) and "?" in text:
+                return "?"
+        return ""
+
+    def _pieces(self, values: Dict[int, str]) -> List[Tuple[str, str]]:
+        # -> [(kind, text)] in playback order
+        pieces: List[Tuple[str, str]] = []
+        for idx, (kind, text) in enumerate(self.parts):
+            if kind == "fixed":
+                if idx > 0 and self.parts[idx - 1] == ("slot", "name"):
+                    text = _LEADING_PUNCT.sub("", text, count=1)  # already said with the name
+                if not _PUNCT_ONLY.match(text):
+                    pieces.append(("fixed", text.strip()))
+            elif text == "name":
+                pieces.append(("slot", self._name_piece(idx, values.get(idx, ""), pieces)))
+            else:
+                pieces.append(("slot", values.get(idx, "") + self._slot_suffix(idx)))
+        return [(kind, text) for kind, text in pieces if text.strip()]
+
+    def _name_piece(self, idx: int, name: str, pieces: List[Tuple[str, str]]) -> str:
+        # Names are synthesized live anyway: a short lead-in and the punctuation after the
+        # name go in the same clip, so "Hi Christopher," keeps its intonation
+        if pieces and pieces[-1][0] == "fixed" and len(pieces[-1][1]) < _NAME_LEAD_IN_CHARS:
+            name = f"{pieces.pop()[1]} {name}"
+        if idx + 1 < len(self.parts) and self.parts[idx + 1][0] == "fixed":
+            name += _LEADING_PUNCT.match(self.parts[idx + 1][1]).group(1)
+        return name
+
+    def split(self, sentence: str) -> Optional[List[str]]:
+        m = self.regex.fullmatch(sentence.strip())
+        if not m:
+            return None
+        values = {int(k[1:]): v for k, v in m.groupdict().items()}
+        return [text for _, text in self._pieces(values)]
+
+    def fixed_pieces(self) -> List[str]:
+        return [text for kind, text in self._pieces({}) if kind == "fixed"]
+
+    def slot_pieces(self, slot_values: Dict[str, Iterable[str]]) -> List[str]:
+        # every piece a known slot value would render as in this template
+        texts: List[str] = []
+        for idx, (kind, slot_type) in enumerate(self.parts):
+            if kind == "slot":
+                texts.extend(v + self._slot_suffix(idx) for v in slot_values.get(slot_type, ()))
+        return texts
+
+
+_COMPILED = [PromptTemplate(t) for t in TEMPLATES]
+
+# counters for /metrics
+template_hits = 0
+template_misses = 0
+
+
+def match_template(text: str) -> Optional[List[str]]:
+    # Sentence(s) -> pieces to synthesize, or None if no template matches
+    for template in _COMPILED:
+        pieces = template.split(text)
+        if pieces:
+            return pieces
+    return None
+
+
+def count_template_use(hits: int, misses: int) -> None:
+    global template_hits, template_misses
+    template_hits += hits
+    template_misses += misses
+
+
+def template_prewarm_texts(slot_values: Dict[str, Iterable[str]]) -> List[str]:
+    # Fixed pieces of every template + the known slot values (dates, times, meds)
+    slot_values = {k: list(v) for k, v in slot_values.items()}
+    texts: List[str] = list(COMMON_SENTENCES)
+    for template in _COMPILED:
+        texts.extend(template.fixed_pieces())
+        texts.extend(template.slot_pieces(slot_values))
+    # dedupe, keep order
+    return list(dict.fromkeys(t for t in texts if t))
+
+
+def template_stats() -> Dict[str, object]:
+    return {
+        "enabled": TTS_TEMPLATE_MODE,
+        "template_hits": template_hits,
+        "template_misses": template_misses,
+    }
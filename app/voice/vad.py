@@ -0,0 +1,102 @@
+"""
+app/voice/vad.py
+
+Energy-based voice activity helpers, shared by the CLI mic loop (transcriber.py),
+the web app's streaming recognizer (streaming_stt.py) and the upload endpoints
+(VADTrimmer: trims silence and short-circuits silent uploads before Whisper).
+
+No audio device or model dependencies, only numpy.
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+
+def rms_int16(buf_bytes: bytes) -> float:
+    # Quick RMS volume check to tell if someone’s talking
+
+    a = np.frombuffer(buf_bytes, dtype=np.int16)
+    if a.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean((a.astype(np.float32))**2)))
+
+
+def pcm16_to_float32(buf_bytes: bytes) -> np.ndarray:
+    # Whisper wants float32 [-1, 1], but the mic gives us int16.
+    return np.frombuffer(buf_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class VADTrimmer:
+    """
+    Energy gate for whole uploads before they reach Whisper.
+
+    Cuts leading/trailing non-speech (keeping `pad_ms` around the speech) and reports
+    uploads with less than `min_speech_ms` of voiced audio as silent, so the caller can
+    answer them without running the model. Counters are exposed through /metrics.
+    """
+
+    def __init__(
+        self,
+        rms_threshold: float = 200,   # int16 scale, same as the CLI mic loop
+        frame_ms: int = 30,
+        pad_ms: int = 200,
+        min_speech_ms: int = 90,
+        sample_rate: int = 16000,
+    ):
+        self.rms_threshold = rms_threshold
+        self.frame = sample_rate * frame_ms // 1000
+        self.pad = sample_rate * pad_ms // 1000
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.sample_rate = sample_rate
+
+        # counters
+        self.uploads = 0
+        self.silent_uploads = 0
+        self._audio_s = 0.0
+        self._skipped_s = 0.0
+
+    def trim(self, audio: np.ndarray) -> np.ndarray:
+        # float32 [-1, 1] -> speech part only (empty array if there is no speech)
+        n = len(audio) // self.frame
+        voiced = np.zeros(0, dtype=np.int64)
+        if n:
+            frames = audio[:n * self.frame].reshape(n, self.frame).astype(np.float32)
+            rms = np.sqrt(np.mean(frames ** 2, axis=1)) * 32768.0
+            voiced = np.flatnonzero(rms >= self.rms_threshold)
+
+        if len(voiced) < self.min_speech_frames:
+            trimmed = audio[:0]
+        else:
+            start = max(0, voiced[0] * self.frame - self.pad)
+            end = min(len(audio), (voiced[-1] + 1) * self.frame + self.pad)
+            trimmed = audio[start:end]
+
+        self.uploads += 1
+        self.silent_uploads += int(trimmed.size == 0)
+        self._audio_s += len(audio) / self.sample_rate
+        self._skipped_s += (len(audio) - len(trimmed)) / self.sample_rate
+        return trimmed
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "silent_uploads": self.silent_uploads,
+            "audio_s": round(self._audio_s, 1),
+            "skipped_s": round(self._skipped_s, 1),
+            "skipped_ratio": round(self._skipped_s / self._audio_s, 3) if self._audio_s else 0.0,
+        }
+
+
+# STT_VAD=false sends uploads to Whisper untouched
+VAD_TRIMMER = (
+    VADTrimmer(rms_threshold=float(os.getenv("STT_VAD_RMS", "200")))
+    if os.getenv("STT_VAD", "true").lower() in ("1", "true", "yes", "y")
+    else None
+)
+
+
+def vad_stats() -> dict:
+    return VAD_TRIMMER.stats() if VAD_TRIMMER is not None else {"enabled": False}
@@ -0,0 +1,351 @@
+"""
+app/voice/web_tts.py
+
+Edge TTS helpers for the web app (synthesizer.py covers conversation_loop.py).
+
+- tts_stream: yields MP3 chunks as soon as edge-tts produces them.
+- tts_to_mp3_bytes: the whole clip in memory, for the JSON endpoints.
+- voice_segments: splits an agent reply into (text, voice) parts, e.g. Ava + William
+  on escalation to the fake human representative.
+- plan_tts / synthesize_segments / stream_segments: split those parts into sentences,
+  synthesize them concurrently (bounded) and reassemble the audio in order, so total
+  TTS time approaches the slowest sentence instead of the sum of all of them.
+- SentenceChunker / stream_sentences: the same for a reply that is still being
+  generated: LLM tokens are cut into sentences as they arrive and each one goes to
+  TTS right away, so the first audio only waits for the first sentence.
+- Every clip goes through the TTSCache (tts_cache.py), and prewarm_tts fills it with
+  the static prompts at startup.
+- In template mode (tts_templates.py) personalized sentences are planned as fixed
+  pieces + slot values, so they hit the cache too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import edge_tts
+
+from app.voice.tts_cache import TTSCache
+from app.voice.tts_templates import TTS_TEMPLATE_MODE, count_template_use, match_template
+
+# ----- TTS config -----
+EDGE_TTS_VOICE = "en-US-AvaNeural"
+EDGE_TTS_VOICE_INTRO = "en-US-RogerNeural"
+EDGE_TTS_FAKE_REP_VOICE = "en-AU-WilliamMultilingualNeural"
+FAKE_REP_TRIGGER = "Hi, this is William"
+EDGE_TTS_RATE = "+15%"
+
+# max edge-tts requests in flight for one reply
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "4"))
+# sentences shorter than this get merged into the next one (keeps prosody natural)
+TTS_MIN_SEGMENT_CHARS = 24
+
+# sentence boundary: . ! ? followed by whitespace and the start of a new sentence
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'A-Z0-9])")
+
+# ----- Audio cache -----
+# TTS_CACHE=false disables it, TTS_CACHE_DIR="" keeps it memory-only
+TTS_CACHE = (
+    TTSCache(
+        memory_max_bytes=int(os.getenv("TTS_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        disk_dir=os.getenv("TTS_CACHE_DIR", ".cache/tts"),
+        disk_max_bytes=int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024,
+    )
+    if os.getenv("TTS_CACHE", "true").lower() in ("1", "true", "yes", "y")
+    else None
+)
+
+Segment = Tuple[str, str]  # (text, voice)
+
+# cache key -> synthesis already in flight (concurrent callers share one edge-tts request)
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+async def tts_stream(text: str, voice: str) -> AsyncIterator[bytes]:
+    # Forward MP3 chunks as Communicate.stream() yields them (or the cached clip in one go)
+    if TTS_CACHE is not None:
+        cached = TTS_CACHE.get(voice, EDGE_TTS_RATE, text)
+        if cached:
+            yield cached
+            return
+
+    mp3_fp = io.BytesIO()
+    communicate = edge_tts.Communicate(
+        text,
+        voice=voice,
+        rate=EDGE_TTS_RATE,
+    )
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            mp3_fp.write(chunk["data"])
+            yield chunk["data"]
+
+    # only reached if the whole clip was streamed
+    if TTS_CACHE is not None:
+        TTS_CACHE.put(voice, EDGE_TTS_RATE, text, mp3_fp.getvalue())
+
+
+async def _collect_mp3(text: str, voice: str) -> bytes:
+    mp3_fp = io.BytesIO()
+    async for data in tts_stream(text, voice):
+        mp3_fp.write(data)
+    return mp3_fp.getvalue()
+
+
+async def tts_to_mp3_bytes(text: str, voice: str) -> bytes:
+    """
+    Use Edge TTS to synthesize `text` into MP3 bytes (in-memory),
+    without playing locally.
+    """
+    key = TTSCache.key(voice, EDGE_TTS_RATE, text)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_collect_mp3(text, voice))
+        _inflight[key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def voice_segments(agent_message: str, rep_mode: bool) -> List[Segment]:
+    # Split message read between Ava and William on escalation to representative
+    if rep_mode and FAKE_REP_TRIGGER in agent_message:
+        before, sep, after = agent_message.partition(FAKE_REP_TRIGGER)
+        transfer_text = before.strip()
+        rep_text = (sep + " " + after).strip()
+
+        segments: List[Segment] = []
+        # Ava reads the transfer message
+        if transfer_text:
+            segments.append((transfer_text, EDGE_TTS_VOICE))
+        # William reads his intro
+        segments.append((rep_text, EDGE_TTS_FAKE_REP_VOICE))
+        return segments
+
+    # Normal case: single voice for the whole message (William after escalation)
+    voice = EDGE_TTS_FAKE_REP_VOICE if rep_mode else EDGE_TTS_VOICE
+    return [(agent_message, voice)]
+
+
+# ----- Sentence planner -----
+
+def _raw_sentences(text: str) -> List[str]:
+    return [p.strip() for p in _SENTENCE_BOUNDARY.split(text.strip()) if p.strip()]
+
+
+def split_sentences(text: str, min_chars: int = TTS_MIN_SEGMENT_CHARS) -> List[str]:
+    return _merge_short(_raw_sentences(text), min_chars)
+
+
+def _merge_short(parts: List[str], min_chars: int = TTS_MIN_SEGMENT_CHARS) -> List[str]:
+    merged: List[str] = []
+    for part in parts:
+        # "Dr." / "Perfect!" etc. ride along with the following sentence
+        if merged and len(merged[-1]) < min_chars:
+            merged[-1] = f"{merged[-1]} {part}"
+        else:
+            merged.append(part)
+    return merged
+
+
+def _template_pieces(text: str, record: bool = True) -> List[str]:
+    # Templates are matched on the unmerged sentences (longest run first), so a match
+    # doesn't depend on how long the name in it is; the sentences in between are merged
+    # as usual. Personalized sentences -> cached fixed pieces + slot values.
+    sentences = _raw_sentences(text)
+    pieces: List[str] = []
+    loose: List[str] = []
+    hits = misses = 0
+    i = 0
+    while i < len(sentences):
+        for j in range(len(sentences), i, -1):
+            matched = match_template(" ".join(sentences[i:j]))
+            if matched:
+                break
+        else:
+            loose.append(sentences[i])
+            i += 1
+            continue
+        merged = _merge_short(loose)
+        pieces += merged + matched
+        hits, misses, loose, i = hits + 1, misses + len(merged), [], j
+    merged = _merge_short(loose)
+    if record:
+        count_template_use(hits, misses + len(merged))
+    return pieces + merged
+
+
+def plan_tts(segments: List[Segment], record_templates: bool = True) -> List[Segment]:
+    # (text, voice) parts -> one (sentence, voice) entry per synthesis request, in playback order
+    # record_templates=False: planning for the prewarm, keep it out of the template stats
+    plan: List[Segment] = []
+    for text, voice in segments:
+        if TTS_TEMPLATE_MODE:
+            plan.extend((piece, voice) for piece in _template_pieces(text, record_templates))
+        else:
+            plan.extend((sentence, voice) for sentence in split_sentences(text))
+    return plan
+
+
+async def _bounded_tts(sem: asyncio.Semaphore, text: str, voice: str) -> bytes:
+    async with sem:
+        return await tts_to_mp3_bytes(text, voice)
+
+
+async def synthesize_segments(segments: List[Segment], max_parallel: int = TTS_MAX_PARALLEL) -> bytes:
+    return await _synthesize_plan(plan_tts(segments), max_parallel)
+
+
+async def _synthesize_plan(plan: List[Segment], max_parallel: int = TTS_MAX_PARALLEL) -> bytes:
+    if not plan:
+        return b""
+
+    sem = asyncio.Semaphore(max(1, max_parallel))
+    clips = await asyncio.gather(
+        *(_bounded_tts(sem, text, voice) for text, voice in plan),
+        return_exceptions=True,
+    )
+
+    failures = [c for c in clips if isinstance(c, BaseException)]
+    if len(failures) == len(clips):
+        raise failures[0]
+    for (text, _), clip in zip(plan, clips):
+        if isinstance(clip, BaseException):
+            print(f"[WARN] Failed to synthesize segment {text[:40]!r}: {clip}")
+
+    # MP3 frames can simply be concatenated back to back
+    return b"".join(c for c in clips if not isinstance(c, BaseException))
+
+
+async def stream_segments(segments: List[Segment], max_parallel: int = TTS_MAX_PARALLEL) -> AsyncIterator[bytes]:
+    plan = plan_tts(segments)
+    if not plan:
+        return
+
+    # first sentence streams live; the rest are synthesized in the background meanwhile.
+    # Like synthesize_segments, a failed sentence is skipped (and logged); only a reply
+    # where every sentence failed raises.
+    sem = asyncio.Semaphore(max(1, max_parallel - 1))
+    pending = [asyncio.create_task(_bounded_tts(sem, text, voice)) for text, voice in plan[1:]]
+    failures: List[Exception] = []
+    try:
+        first_text, first_voice = plan[0]
+        try:
+            async for data in tts_stream(first_text, first_voice):
+                yield data
+        except Exception as e:
+            print(f"[WARN] Failed to stream segment {first_text[:40]!r}: {e}")
+            failures.append(e)
+        for (text, _), task in zip(plan[1:], pending):
+            try:
+                clip = await task
+            except Exception as e:
+                print(f"[WARN] Failed to synthesize segment {text[:40]!r}: {e}")
+                failures.append(e)
+                continue
+            yield clip
+        if len(failures) == len(plan):
+            raise failures[0]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# ----- Incremental (token-streamed) replies -----
+
+class SentenceChunker:
+    """Cuts a stream of LLM tokens into TTS-sized sentences as soon as each one is complete."""
+
+    def __init__(self, min_chars: int = TTS_MIN_SEGMENT_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        parts = _SENTENCE_BOUNDARY.split(self._buffer)
+        # the last part may still be growing; the boundary needs the next sentence's first char
+        complete, self._buffer = parts[:-1], parts[-1]
+
+        sentences: List[str] = []
+        short = ""
+        for part in complete:
+            short = f"{short} {part.strip()}".strip()
+            # short sentences ride along with the next one, like split_sentences
+            if len(short) >= self.min_chars:
+                sentences.append(short)
+                short = ""
+        if short:
+            self._buffer = f"{short} {self._buffer}"
+        return sentences
+
+    def flush(self) -> List[str]:
+        text, self._buffer = self._buffer.strip(), ""
+        return [text] if text else []
+
+
+async def stream_sentences(
+    sentences: "asyncio.Queue[Optional[Segment]]",
+    max_parallel: int = TTS_MAX_PARALLEL,
+) -> AsyncIterator[Tuple[str, object]]:
+    # (sentence, voice) items from the queue (None = reply finished) ->
+    # ("sentence", text) as each arrives and ("audio", mp3) in playback order.
+    # Synthesis of a sentence starts the moment it arrives; audio is yielded as soon as
+    # every earlier clip is out, without waiting for the rest of the reply.
+    sem = asyncio.Semaphore(max(1, max_parallel))
+    clips: Deque[asyncio.Task] = deque()
+    next_item: Optional[asyncio.Future] = asyncio.ensure_future(sentences.get())
+    try:
+        while next_item is not None or clips:
+            waiting = [next_item] if next_item is not None else []
+            if clips:
+                waiting.append(clips[0])
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            while clips and clips[0].done():
+                clip = clips.popleft()
+                if clip.exception() is not None:
+                    print(f"[WARN] Failed to synthesize streamed sentence: {clip.exception()}")
+                    continue
+                yield "audio", clip.result()
+
+            if next_item is not None and next_item.done():
+                item = next_item.result()
+                if item is None:
+                    next_item = None
+                    continue
+                text, voice = item
+                yield "sentence", text
+                for piece, piece_voice in plan_tts([(text, voice)]):
+                    clips.append(asyncio.create_task(_bounded_tts(sem, piece, piece_voice)))
+                next_item = asyncio.ensure_future(sentences.get())
+    finally:
+        if next_item is not None:
+            next_item.cancel()
+        for clip in clips:
+            clip.cancel()
+
+
+async def prewarm_tts(segments: List[Segment]) -> None:
+    # Synthesize every static prompt once so live calls hit the cache
+    if TTS_CACHE is None:
+        return
+    started = time.perf_counter()
+    plan = plan_tts(segments, record_templates=False)
+    try:
+        await _synthesize_plan(plan)
+    except Exception as e:
+        print(f"[WARN] TTS prewarm failed: {e}")
+        return
+    print(
+        f"[ClinAI-Web] TTS cache prewarmed {len(plan)} clips "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def tts_cache_stats() -> Dict[str, object]:
+    return TTS_CACHE.stats() if TTS_CACHE is not None else {"enabled": False}
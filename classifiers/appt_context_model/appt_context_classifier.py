@@ -1,5 +1,6 @@
 import os
 import torch
+from app.services.model_bundle import resolve_model  # before transformers: may set HF_HUB_OFFLINE
 from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
 
 # Hugging Face model repo (env override for prod)
@@ -8,8 +9,8 @@ MODEL_ID = os.getenv(
     "Exogenesis/clinai-appt-context-classifier",
 )
 
-_tokenizer = DistilBertTokenizerFast.from_pretrained(MODEL_ID)
-_model = DistilBertForSequenceClassification.from_pretrained(MODEL_ID).eval()
+_tokenizer = DistilBertTokenizerFast.from_pretrained(resolve_model(MODEL_ID))
+_model = DistilBertForSequenceClassification.from_pretrained(resolve_model(MODEL_ID)).eval()
 
 # use the fine-tuned distilBERT model to detect if user no longer wants to make an appointment
 def classify_appt_context(text: str) -> str:
@@ -26,3 +27,16 @@ def classify_appt_context(text: str) -> str:
         classification = _model.config.id2label[pred_id]
     return classification
 
+
+# padded batch of utterances -> labels (one forward pass, used by the batching server)
+def classify_appt_context_batch(texts: list) -> list:
+    enc = _tokenizer(
+        texts,
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+        max_length=128,
+    )
+    with torch.no_grad():
+        pred_ids = torch.argmax(_model(**enc).logits, dim=1).tolist()
+    return [_model.config.id2label[i] for i in pred_ids]
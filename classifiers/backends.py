@@ -0,0 +1,172 @@
+# classifiers/backends.py
+
+"""
+Single import point for the turn classifiers used by the web app and the CLI.
+
+CLASSIFIER_MODE picks the implementation behind the same three functions:
+
+- single (default): the three fine-tuned DistilBERTs (intent_model, appt_context_model,
+  confirmation_model), one encoder each
+- multitask: one shared encoder + three heads (multitask_model), each utterance
+  encoded once per turn
+
+CLASSIFIER_BACKEND picks the runtime:
+
+- torch (default): eager PyTorch fp32
+- onnx: ONNX Runtime, int8-quantized by default (classifiers/onnx_backend.py, exported
+  with classifiers/onnx_export.py); single mode only
+
+CLASSIFIER_BATCHING=true puts a BatchingClassifier (batch_server.py) in front of each
+task, so concurrent sessions share padded forward passes instead of running one each.
+
+CLASSIFIER_CASCADE=true puts the TF-IDF fast tier (fast_tier.py) in front of the tasks
+listed in CLASSIFIER_CASCADE_TASKS (confirmation + appt_context by default); the model
+above only runs when the fast tier's calibrated confidence is below the threshold.
+
+Nothing is loaded at import: load_task() builds one task's predictor (the web app's
+model registry calls it in the background, in parallel), and the classify_* functions
+load whatever is still missing on first use (the CLI just relies on that).
+Only the selected models are ever imported, so only they end up in RAM.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, List, Tuple
+
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "single").lower()
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "torch").lower()
+CLASSIFIER_BATCHING = os.getenv("CLASSIFIER_BATCHING", "false").lower() in ("1", "true", "yes", "y")
+CLASSIFIER_CASCADE = os.getenv("CLASSIFIER_CASCADE", "false").lower() in ("1", "true", "yes", "y")
+
+TASKS = ("intent", "appt_context", "confirmation")
+
+if CLASSIFIER_BACKEND not in ("torch", "onnx"):
+    raise ValueError(f"Unknown CLASSIFIER_BACKEND {CLASSIFIER_BACKEND!r} (expected 'torch' or 'onnx')")
+if CLASSIFIER_MODE not in ("single", "multitask"):
+    raise ValueError(f"Unknown CLASSIFIER_MODE {CLASSIFIER_MODE!r} (expected 'single' or 'multitask')")
+if CLASSIFIER_BACKEND == "onnx" and CLASSIFIER_MODE != "single":
+    raise ValueError("CLASSIFIER_BACKEND=onnx is only available for CLASSIFIER_MODE=single")
+
+Predict = Callable[[str], str]
+
+# task -> text -> label, once loaded
+_predictors: Dict[str, Predict] = {}
+_task_locks = {task: threading.Lock() for task in TASKS}
+_SERVERS = {}
+_FAST_TIER = None
+_fast_tier_lock = threading.Lock()
+
+
+def _load_model(task: str) -> Tuple[Predict, Callable[[List[str]], List[str]]]:
+    # -> (one utterance -> label, batch -> labels) for the selected mode/backend
+    if CLASSIFIER_BACKEND == "onnx":
+        from classifiers import onnx_backend
+        clf = onnx_backend.get_classifier(task)
+        return clf.predict, clf.predict_batch
+
+    if CLASSIFIER_MODE == "multitask":
+        from classifiers.multitask_model import multitask_classifier as mt
+        return (lambda text: mt.classify_batch(task, [text])[0]), (lambda texts: mt.classify_batch(task, texts))
+
+    if task == "intent":
+        from classifiers.intent_model import intent_classifier as m
+        return (lambda text: m.classify_intent(text, [])), m.classify_intent_batch
+    if task == "appt_context":
+        from classifiers.appt_context_model import appt_context_classifier as m
+        return m.classify_appt_context, m.classify_appt_context_batch
+    from classifiers.confirmation_model import confirmation_classifier as m
+    return m.classify_confirmation, m.classify_confirmation_batch
+
+
+def _fast_tier():
+    global _FAST_TIER
+    with _fast_tier_lock:
+        if _FAST_TIER is None:
+            from classifiers.fast_tier import FastTier
+            _FAST_TIER = FastTier(
+                tasks=[t.strip() for t in os.getenv("CLASSIFIER_CASCADE_TASKS", "confirmation,appt_context").split(",") if t.strip()],
+                threshold=float(os.getenv("CLASSIFIER_CASCADE_THRESHOLD", "0.9")),
+            )
+        return _FAST_TIER
+
+
+def load_task(task: str) -> Predict:
+    # Model (+ batching server, + fast tier) for one task; safe to call from several threads
+    predict = _predictors.get(task)
+    if predict is not None:
+        return predict
+
+    with _task_locks[task]:
+        if task in _predictors:
+            return _predictors[task]
+
+        predict, predict_batch = _load_model(task)
+
+        # cross-session micro-batching: callers become thin clients of the server
+        if CLASSIFIER_BATCHING:
+            from classifiers.batch_server import BatchingClassifier
+            server = _SERVERS[task] = BatchingClassifier(
+                task,
+                predict_batch,
+                max_batch=int(os.getenv("CLASSIFIER_BATCH_MAX", "16")),
+                max_wait_ms=float(os.getenv("CLASSIFIER_BATCH_WAIT_MS", "3")),
+            )
+            predict = server.classify
+
+        # fast tier answers first; the model above only runs when it's unsure
+        if CLASSIFIER_CASCADE:
+            fast_tier = _fast_tier()
+            if task in fast_tier.models:
+                slow = predict
+                predict = lambda text: fast_tier.classify(task, text, slow)  # noqa: E731
+
+        _predictors[task] = predict
+        return predict
+
+
+def warmup_task(task: str) -> None:
+    # first inference pays for lazy init (kernels, allocator, tokenizer caches)
+    load_task(task)("hello, I'd like to book an appointment")
+
+
+def load_all() -> None:
+    for task in TASKS:
+        load_task(task)
+
+
+def classify_intent(text: str, patient_intents: list) -> str:
+    intent = load_task("intent")(text)
+    patient_intents.append(intent)
+    return intent
+
+
+# detect if user no longer wants to make an appointment
+def classify_appt_context(text: str) -> str:
+    return load_task("appt_context")(text)
+
+
+# appointment / refill confirmation
+def classify_confirmation(text: str) -> str:
+    return load_task("confirmation")(text)
+
+
+def shutdown() -> None:
+    for server in _SERVERS.values():
+        server.stop()
+
+
+def classifier_stats() -> dict:
+    stats = {
+        "mode": CLASSIFIER_MODE,
+        "backend": CLASSIFIER_BACKEND,
+        "batching": CLASSIFIER_BATCHING,
+        "loaded": sorted(_predictors),
+    }
+    if CLASSIFIER_MODE == "multitask" and _predictors:
+        from classifiers.multitask_model.multitask_classifier import cache_stats
+        stats["encoder_cache"] = cache_stats()
+    if _SERVERS:
+        stats["batch_servers"] = {task: server.stats() for task, server in _SERVERS.items()}
+    if _FAST_TIER is not None:
+        stats["cascade"] = _FAST_TIER.stats()
+    return stats
@@ -0,0 +1,114 @@
+# classifiers/batch_server.py
+
+"""
+Cross-session micro-batching for the turn classifiers.
+
+handle_turn runs on the turn engine's worker threads, so under load several sessions
+classify an utterance at the same moment, each with its own batch-size-1 forward pass
+fighting over the same cores. A BatchingClassifier owns one model (one task): callers
+put (text, Future) on its queue and block on the future; a single worker thread takes
+the first request, keeps collecting for at most `max_wait_ms` (or until `max_batch`),
+runs ONE padded forward pass and resolves every future.
+
+Enabled with CLASSIFIER_BATCHING=true (see classifiers/backends.py).
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List
+
+_STOP = object()
+
+
+class BatchingClassifier:
+
+    def __init__(
+        self,
+        name: str,
+        predict_batch: Callable[[List[str]], List[str]],
+        max_batch: int = 16,
+        max_wait_ms: float = 3.0,
+    ):
+        self.name = name
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+
+        self._start()
+        # the worker thread doesn't survive fork (pre-fork server, app/server.py): new one per child
+        os.register_at_fork(after_in_child=self._start)
+
+        # counters (only the worker thread writes them)
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.failed_batches = 0
+        self._total_run_ms = 0.0
+
+    def _start(self) -> None:
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"clinai-clf-{self.name}", daemon=True)
+        self._thread.start()
+
+    def classify(self, text: str) -> str:
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def stop(self) -> None:
+        self._queue.put(_STOP)
+
+    def _collect(self, first) -> List[tuple]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next loop
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+
+            started = time.perf_counter()
+            try:
+                labels = self.predict_batch([text for text, _ in batch])
+            except Exception as e:
+                self.failed_batches += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self._total_run_ms += 1000 * (time.perf_counter() - started)
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for (_, future), label in zip(batch, labels):
+                future.set_result(label)
+
+    def stats(self) -> dict:
+        batches = self.batches
+        return {
+            "requests": self.requests,
+            "batches": batches,
+            "avg_batch_size": round(self.requests / batches, 2) if batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "failed_batches": self.failed_batches,
+            "avg_batch_ms": round(self._total_run_ms / batches, 2) if batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
@@ -0,0 +1,240 @@
+# classifiers/distill.py
+
+"""
+Knowledge distillation of the DistilBERT classifiers into smaller students.
+
+The current checkpoints (classifiers/tasks.py TASK_MODEL_IDS) are the teachers. Each
+student is a DistilBertForSequenceClassification with fewer layers and/or a smaller
+hidden size, trained on the same data/*_examples CSVs against a mix of the teacher's
+softened logits and the true labels:
+
+    loss = alpha * T^2 * KL(student/T || teacher/T) + (1 - alpha) * CE(student, label)
+
+Layer-reduced students start from teacher layers spread over its depth (same hidden size, so the
+weights carry over); narrower students start from scratch.
+
+Run from the repo root:
+
+    python -m classifiers.distill --tasks confirmation appt_context --students L3 L2
+    python -m classifiers.distill --report-only            # re-time saved students
+
+Writes students to classifiers/students/<task>/<student>/ (loadable through the usual
+INTENT_MODEL_ID / APPT_CONTEXT_MODEL_ID / CONFIRM_MODEL_ID) and the accuracy vs p50/p95
+CPU latency vs memory table to metrics/classifier_students.csv.
+"""
+
+import argparse
+import copy
+import csv
+import os
+import statistics
+import time
+
+from app.services.model_bundle import resolve_model  # before transformers: may set HF_HUB_OFFLINE
+
+import torch
+import torch.nn.functional as F
+from sklearn.model_selection import train_test_split
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast, set_seed
+
+from classifiers.tasks import TASK_LABELS, TASK_MODEL_IDS, load_task_examples
+
+STUDENTS_DIR = "./classifiers/students"
+REPORT_PATH = "./metrics/classifier_students.csv"
+
+# name -> (n_layers, dim, hidden_dim, n_heads); dim=None keeps the teacher's width
+STUDENT_CONFIGS = {
+    "L4": (4, None, None, None),
+    "L3": (3, None, None, None),
+    "L2": (2, None, None, None),
+    "L4-H384": (4, 384, 1536, 6),
+}
+
+EPOCHS = 4
+BATCH_SIZE = 32
+LR = 5e-5
+TEMPERATURE = 2.0
+ALPHA = 0.7
+MAX_LENGTH = 128
+
+
+def _layer_map(teacher_layers: int, student_layers: int):
+    # spread the student layers over the teacher's depth, always keeping the last one
+    if student_layers == 1:
+        return [teacher_layers - 1]
+    step = (teacher_layers - 1) / (student_layers - 1)
+    return [round(i * step) for i in range(student_layers)]
+
+
+def make_student(teacher: DistilBertForSequenceClassification, name: str) -> DistilBertForSequenceClassification:
+    n_layers, dim, hidden_dim, n_heads = STUDENT_CONFIGS[name]
+    config = copy.deepcopy(teacher.config)
+    config.n_layers = n_layers
+
+    if dim is None:
+        student = DistilBertForSequenceClassification(config)
+        student_state = student.state_dict()
+        state = teacher.state_dict()
+        keep = _layer_map(teacher.config.n_layers, n_layers)
+        for key, value in state.items():
+            if ".transformer.layer." in key:
+                prefix, rest = key.split(".transformer.layer.", 1)
+                teacher_idx, tail = rest.split(".", 1)
+                if int(teacher_idx) not in keep:
+                    continue
+                key = f"{prefix}.transformer.layer.{keep.index(int(teacher_idx))}.{tail}"
+            student_state[key].copy_(value)
+        return student
+
+    config.dim, config.hidden_dim, config.n_heads = dim, hidden_dim, n_heads
+    return DistilBertForSequenceClassification(config)
+
+
+def _batches(tok, df, shuffle: bool):
+    if shuffle:
+        df = df.sample(frac=1.0, random_state=int(torch.randint(0, 10**6, (1,))))
+    for i in range(0, len(df), BATCH_SIZE):
+        rows = df.iloc[i:i + BATCH_SIZE]
+        enc = tok(list(rows["text"]), truncation=True, padding=True, max_length=MAX_LENGTH, return_tensors="pt")
+        yield enc, torch.tensor(rows["labels"].values)
+
+
+def distill(task: str, name: str, teacher, tok, train_df):
+    student = make_student(teacher, name)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=LR, weight_decay=0.01)
+
+    for epoch in range(EPOCHS):
+        student.train()
+        total = 0.0
+        n = 0
+        for enc, labels in _batches(tok, train_df, shuffle=True):
+            with torch.no_grad():
+                teacher_logits = teacher(**enc).logits
+            logits = student(**enc).logits
+
+            soft = F.kl_div(
+                F.log_softmax(logits / TEMPERATURE, dim=-1),
+                F.softmax(teacher_logits / TEMPERATURE, dim=-1),
+                reduction="batchmean",
+            ) * TEMPERATURE ** 2
+            hard = F.cross_entropy(logits, labels)
+            loss = ALPHA * soft + (1 - ALPHA) * hard
+
+            loss.backward()
+            optimizer.step()
+            optimizer.zero_grad()
+            total += loss.item()
+            n += 1
+        print(f"[distill] {task}/{name} epoch {epoch + 1}: loss={total / max(n, 1):.4f}")
+
+    student.eval()
+    save_dir = os.path.join(STUDENTS_DIR, task, name)
+    student.save_pretrained(save_dir)
+    tok.save_pretrained(save_dir)
+    return student
+
+
+# ---------- evaluation ----------
+
+def accuracy(model, tok, val_df) -> float:
+    correct = 0
+    with torch.no_grad():
+        for enc, labels in _batches(tok, val_df, shuffle=False):
+            correct += int((model(**enc).logits.argmax(dim=1) == labels).sum())
+    return correct / len(val_df)
+
+
+def latency(model, tok, texts, warmup: int = 10):
+    # batch size 1, as in a live turn
+    def run(text):
+        enc = tok(text, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LENGTH)
+        with torch.no_grad():
+            model(**enc)
+
+    for text in texts[:warmup]:
+        run(text)
+    times = []
+    for text in texts:
+        started = time.perf_counter()
+        run(text)
+        times.append(1000 * (time.perf_counter() - started))
+    times.sort()
+    return statistics.median(times), times[int(0.95 * (len(times) - 1))]
+
+
+def memory_mb(model) -> float:
+    # weights + buffers held in RAM
+    n_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+    n_bytes += sum(b.numel() * b.element_size() for b in model.buffers())
+    return n_bytes / 1e6
+
+
+def report_row(task, name, model, tok, val_df, latency_texts):
+    p50, p95 = latency(model, tok, latency_texts)
+    row = {
+        "task": task,
+        "model": name,
+        "layers": model.config.n_layers,
+        "dim": model.config.dim,
+        "params_m": round(sum(p.numel() for p in model.parameters()) / 1e6, 1),
+        "memory_mb": round(memory_mb(model), 1),
+        "accuracy": round(accuracy(model, tok, val_df), 4),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+    }
+    print(
+        f"[report] {task:<13} {name:<9} acc={row['accuracy']:.4f} "
+        f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms mem={row['memory_mb']}MB"
+    )
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", nargs="+", default=list(TASK_LABELS), choices=list(TASK_LABELS))
+    parser.add_argument("--students", nargs="+", default=list(STUDENT_CONFIGS), choices=list(STUDENT_CONFIGS))
+    parser.add_argument("--report-only", action="store_true", help="time students already in classifiers/students")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads while timing")
+    parser.add_argument("-n", type=int, default=200, help="utterances timed per model")
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args()
+
+    set_seed(42)
+    rows = []
+    for task in args.tasks:
+        df = load_task_examples(task)
+        # 90/10 stratified split; the teachers' own splits differ, so their accuracy here can be
+        # optimistic -- compare students against each other and against the latency budget
+        train_df, val_df = train_test_split(df, test_size=0.1, stratify=df["labels"], random_state=42)
+        latency_texts = val_df["text"].sample(n=args.n, replace=True, random_state=42).tolist()
+
+        tok = DistilBertTokenizerFast.from_pretrained(resolve_model(TASK_MODEL_IDS[task]))
+        teacher = DistilBertForSequenceClassification.from_pretrained(resolve_model(TASK_MODEL_IDS[task])).eval()
+
+        students = {}
+        for name in args.students:
+            if args.report_only:
+                path = os.path.join(STUDENTS_DIR, task, name)
+                if not os.path.isdir(path):
+                    print(f"[report] {task}/{name}: not trained, skipping")
+                    continue
+                students[name] = DistilBertForSequenceClassification.from_pretrained(path).eval()
+            else:
+                torch.set_num_threads(os.cpu_count() or 1)
+                students[name] = distill(task, name, teacher, tok, train_df)
+
+        torch.set_num_threads(args.threads)
+        rows.append(report_row(task, "teacher", teacher, tok, val_df, latency_texts))
+        for name, student in students.items():
+            rows.append(report_row(task, name, student, tok, val_df, latency_texts))
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[report] table written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# classifiers/fast_tier.py
+
+"""
+TF-IDF + logistic regression fast tier in front of the DistilBERT classifiers.
+
+Most confirmation / exit answers are trivial ("yes", "no", "that works", "never mind"),
+so a linear model over word + character n-grams gets them right in well under a
+millisecond. Its probabilities are calibrated (CalibratedClassifierCV), and when the
+top one is below the threshold the utterance goes to the transformer as before.
+
+Train and evaluate from the repo root:
+
+    python -m classifiers.fast_tier train                 # one .joblib per task
+    python -m classifiers.fast_tier report --threshold 0.9
+
+Enabled with CLASSIFIER_CASCADE=true (see classifiers/backends.py).
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import joblib
+import numpy as np
+
+FAST_TIER_DIR = os.getenv("FAST_TIER_DIR", "./classifiers/fast_tier_models")
+
+
+def _model_path(task: str, model_dir: str = FAST_TIER_DIR) -> str:
+    return os.path.join(model_dir, f"{task}.joblib")
+
+
+def build_pipeline():
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import FeatureUnion, Pipeline
+
+    features = FeatureUnion([
+        ("words", TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, min_df=1)),
+        # character n-grams cope with typos / STT slips ("yeah", "yea", "ya")
+        ("chars", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), sublinear_tf=True, min_df=2)),
+    ])
+    clf = CalibratedClassifierCV(
+        LogisticRegression(C=10.0, max_iter=2000, class_weight="balanced"),
+        method="sigmoid",
+        cv=5,
+    )
+    return Pipeline([("features", features), ("clf", clf)])
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class FastTier:
+    """One calibrated linear model per task, with cascade counters."""
+
+    def __init__(self, tasks, threshold: float, model_dir: str = FAST_TIER_DIR):
+        self.threshold = threshold
+        self.models = {}
+        for task in tasks:
+            path = _model_path(task, model_dir)
+            if not os.path.exists(path):
+                raise RuntimeError(f"{path} not found. Train it first: python -m classifiers.fast_tier train")
+            self.models[task] = joblib.load(path)
+
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, float]] = {
+            task: {"fast": 0, "fallback": 0, "fast_ms": 0.0, "slow_ms": 0.0} for task in self.models
+        }
+
+    def predict(self, task: str, text: str) -> Tuple[str, float]:
+        model = self.models[task]
+        proba = model.predict_proba([_normalize(text)])[0]
+        best = int(np.argmax(proba))
+        return str(model.classes_[best]), float(proba[best])
+
+    def classify(self, task: str, text: str, slow) -> str:
+        # fast tier if confident enough, otherwise `slow(text)` (the transformer)
+        started = time.perf_counter()
+        label, confidence = self.predict(task, text)
+        fast_ms = 1000 * (time.perf_counter() - started)
+
+        if confidence >= self.threshold:
+            with self._lock:
+                self._counts[task]["fast"] += 1
+                self._counts[task]["fast_ms"] += fast_ms
+            return label
+
+        started = time.perf_counter()
+        label = slow(text)
+        slow_ms = 1000 * (time.perf_counter() - started)
+        with self._lock:
+            counts = self._counts[task]
+            counts["fallback"] += 1
+            counts["fast_ms"] += fast_ms
+            counts["slow_ms"] += slow_ms
+        return label
+
+    def stats(self) -> dict:
+        out = {"threshold": self.threshold}
+        with self._lock:
+            for task, c in self._counts.items():
+                calls = c["fast"] + c["fallback"]
+                avg_slow_ms = c["slow_ms"] / c["fallback"] if c["fallback"] else 0.0
+                out[task] = {
+                    "fast": int(c["fast"]),
+                    "fallback": int(c["fallback"]),
+                    "fallback_rate": round(c["fallback"] / calls, 3) if calls else 0.0,
+                    "avg_fast_ms": round(c["fast_ms"] / calls, 3) if calls else 0.0,
+                    "avg_slow_ms": round(avg_slow_ms, 2),
+                    # transformer passes we skipped, minus what the fast tier itself cost
+                    "est_saved_ms": round(c["fast"] * avg_slow_ms - c["fast_ms"], 1),
+                }
+        return out
+
+
+# ---------- training / report CLI ----------
+
+def _split(task: str):
+    from sklearn.model_selection import train_test_split
+    from classifiers.tasks import load_task_examples
+
+    df = load_task_examples(task)
+    df["text"] = df["text"].map(_normalize)
+    return train_test_split(df, test_size=0.1, stratify=df["label"], random_state=42)
+
+
+def train(tasks, model_dir: str) -> None:
+    os.makedirs(model_dir, exist_ok=True)
+    for task in tasks:
+        train_df, val_df = _split(task)
+        model = build_pipeline().fit(train_df["text"], train_df["label"])
+        acc = float((model.predict(val_df["text"]) == val_df["label"]).mean())
+        joblib.dump(model, _model_path(task, model_dir))
+        print(f"[fast-tier] {task}: {len(train_df)} train, val_acc={acc:.4f} -> {_model_path(task, model_dir)}")
+
+
+def report(tasks, model_dir: str, threshold: float, slow_ms: Optional[float]) -> None:
+    # held-out split: how often the cascade would fall back, and how accurate the fast answers are
+    for task in tasks:
+        _, val_df = _split(task)
+        model = joblib.load(_model_path(task, model_dir))
+
+        started = time.perf_counter()
+        proba = np.vstack([model.predict_proba([t])[0] for t in val_df["text"]])  # batch 1, like live calls
+        fast_ms = 1000 * (time.perf_counter() - started) / len(val_df)
+
+        preds = model.classes_[proba.argmax(axis=1)]
+        confident = proba.max(axis=1) >= threshold
+        fallback_rate = 1 - confident.mean()
+        fast_acc = float((preds[confident] == val_df["label"].values[confident]).mean()) if confident.any() else 0.0
+
+        line = (
+            f"[fast-tier] {task:<13} threshold={threshold} fallback_rate={fallback_rate:.1%} "
+            f"fast_accuracy={fast_acc:.4f} fast_ms={fast_ms:.3f}"
+        )
+        if slow_ms:
+            # expected per-utterance latency vs always running the transformer
+            cascade_ms = fast_ms + fallback_rate * slow_ms
+            line += f" cascade_ms={cascade_ms:.2f} vs transformer_ms={slow_ms:.2f}"
+        print(line)
+
+
+def main():
+    from classifiers.tasks import TASK_LABELS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--tasks", nargs="+", default=list(TASK_LABELS), choices=list(TASK_LABELS))
+    parser.add_argument("--model-dir", default=FAST_TIER_DIR)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--slow-ms", type=float, default=None,
+                        help="report: transformer p50 latency (e.g. from onnx_export bench) to estimate savings")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.tasks, args.model_dir)
+    else:
+        report(args.tasks, args.model_dir, args.threshold, args.slow_ms)
+
+
+if __name__ == "__main__":
+    main()
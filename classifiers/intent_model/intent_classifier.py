@@ -2,6 +2,7 @@
 
 import os
 import torch
+from app.services.model_bundle import resolve_model  # before transformers: may set HF_HUB_OFFLINE
 from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
 
 # Use HF repo
@@ -10,8 +11,8 @@ MODEL_ID = os.getenv(
     "Exogenesis/clinai-intent-classifier",
 )
 
-_tokenizer = DistilBertTokenizerFast.from_pretrained(MODEL_ID)
-_model = DistilBertForSequenceClassification.from_pretrained(MODEL_ID).eval()
+_tokenizer = DistilBertTokenizerFast.from_pretrained(resolve_model(MODEL_ID))
+_model = DistilBertForSequenceClassification.from_pretrained(resolve_model(MODEL_ID)).eval()
 
 def classify_intent(text: str, patient_intents: list) -> str:
     enc = _tokenizer(
@@ -26,4 +27,18 @@ def classify_intent(text: str, patient_intents: list) -> str:
         pred_id = int(torch.argmax(logits, dim=1).item())
         intent = _model.config.id2label[pred_id]
         patient_intents.append(intent)
-    return intent
\ No newline at end of file
+    return intent
+
+
+# padded batch of utterances -> labels (one forward pass, used by the batching server)
+def classify_intent_batch(texts: list) -> list:
+    enc = _tokenizer(
+        texts,
+        return_tensors="pt",
+        truncation=True,
+        padding=True,
+        max_length=128,
+    )
+    with torch.no_grad():
+        pred_ids = torch.argmax(_model(**enc).logits, dim=1).tolist()
+    return [_model.config.id2label[i] for i in pred_ids]
@@ -0,0 +1,156 @@
+# multitask_model/multitask_classifier.py
+
+"""
+One DistilBERT encoder shared by the intent, appointment-context and confirmation heads.
+
+A turn often runs two classifiers on the same utterance (classify_intent, then
+classify_appt_context or classify_confirmation). Here the utterance is encoded once,
+the [CLS] vector is kept in a small LRU cache, and every head used that turn reads it
+from there. One model in RAM instead of three.
+
+Same function signatures as the single-task modules; selected with
+CLASSIFIER_MODE=multitask (see classifiers/backends.py).
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+from torch import nn
+from app.services.model_bundle import resolve_model  # before transformers: may set HF_HUB_OFFLINE
+from transformers import DistilBertModel, DistilBertTokenizerFast
+
+# local dir or HF repo written by train_multitask.py (env override for prod)
+MODEL_ID = os.getenv(
+    "MULTITASK_MODEL_ID",
+    "./classifiers/multitask_model/multitask_classifier",
+)
+HEADS_FILE = "heads.pt"
+LABELS_FILE = "label_map.json"
+
+
+class MultiTaskDistilBert(nn.Module):
+
+    def __init__(self, encoder: DistilBertModel, task_labels: dict):
+        super().__init__()
+        self.encoder = encoder
+        self.task_labels = task_labels
+        dim = encoder.config.dim
+        # same head shape as DistilBertForSequenceClassification, one per task
+        self.heads = nn.ModuleDict({
+            task: nn.Sequential(
+                nn.Linear(dim, dim),
+                nn.ReLU(),
+                nn.Dropout(encoder.config.seq_classif_dropout),
+                nn.Linear(dim, len(labels)),
+            )
+            for task, labels in task_labels.items()
+        })
+
+    def pooled(self, input_ids, attention_mask):
+        # [CLS] hidden state
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state[:, 0]
+
+    def forward(self, input_ids, attention_mask, task: str):
+        return self.heads[task](self.pooled(input_ids, attention_mask))
+
+    def save_pretrained(self, save_dir: str):
+        os.makedirs(save_dir, exist_ok=True)
+        self.encoder.save_pretrained(save_dir)
+        torch.save(self.heads.state_dict(), os.path.join(save_dir, HEADS_FILE))
+        with open(os.path.join(save_dir, LABELS_FILE), "w") as f:
+            json.dump(self.task_labels, f, indent=2)
+
+    @classmethod
+    def from_pretrained(cls, model_id: str):
+        if os.path.isdir(model_id):
+            model_dir = model_id
+        else:  # HF repo
+            from huggingface_hub import snapshot_download
+            model_dir = snapshot_download(model_id)
+
+        with open(os.path.join(model_dir, LABELS_FILE)) as f:
+            task_labels = json.load(f)
+        model = cls(DistilBertModel.from_pretrained(model_dir), task_labels)
+        model.heads.load_state_dict(torch.load(os.path.join(model_dir, HEADS_FILE), map_location="cpu"))
+        return model
+
+
+_tokenizer = DistilBertTokenizerFast.from_pretrained(resolve_model(MODEL_ID))
+_model = MultiTaskDistilBert.from_pretrained(resolve_model(MODEL_ID)).eval()
+
+# ----- encoder output cache -----
+# utterance -> [CLS] vector (1-D); small, only has to outlive one turn
+_CACHE_SIZE = 64
+_cache: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+_cache_lock = threading.Lock()
+encodes = 0
+cache_hits = 0
+
+
+def _encode_batch(texts: list) -> torch.Tensor:
+    # [CLS] vectors for `texts`; only utterances not in the cache go through the encoder
+    global encodes, cache_hits
+    found = {}
+    with _cache_lock:
+        for text in texts:
+            pooled = _cache.get(text)
+            if pooled is not None:
+                _cache.move_to_end(text)
+                cache_hits += 1
+                found[text] = pooled
+
+    missing = list(dict.fromkeys(t for t in texts if t not in found))
+    if missing:
+        enc = _tokenizer(
+            missing,
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=128,
+        )
+        with torch.no_grad():
+            pooled = _model.pooled(enc["input_ids"], enc["attention_mask"])
+
+        with _cache_lock:
+            encodes += len(missing)
+            for text, row in zip(missing, pooled):
+                found[text] = _cache[text] = row
+            while len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return torch.stack([found[t] for t in texts])
+
+
+def _classify(task: str, text: str) -> str:
+    return classify_batch(task, [text])[0]
+
+
+def classify_intent(text: str, patient_intents: list) -> str:
+    intent = _classify("intent", text)
+    patient_intents.append(intent)
+    return intent
+
+
+# detect if user no longer wants to make an appointment
+def classify_appt_context(text: str) -> str:
+    return _classify("appt_context", text)
+
+
+# appointment / refill confirmation
+def classify_confirmation(text: str) -> str:
+    return _classify("confirmation", text)
+
+
+# batch of utterances -> labels for one head (also used by the batching server)
+def classify_batch(task: str, texts: list) -> list:
+    with torch.no_grad():
+        logits = _model.heads[task](_encode_batch(texts))
+    return [_model.task_labels[task][i] for i in torch.argmax(logits, dim=1).tolist()]
+
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return {"encodes": encodes, "cache_hits": cache_hits, "cached": len(_cache)}
@@ -0,0 +1,84 @@
+# multitask_model/train_multitask.py
+# Run from the repo root: python -m classifiers.multitask_model.train_multitask
+
+import random
+
+import pandas as pd
+import torch
+from sklearn.model_selection import train_test_split
+from transformers import DistilBertModel, DistilBertTokenizerFast, set_seed
+
+from classifiers.multitask_model.multitask_classifier import MultiTaskDistilBert
+from classifiers.tasks import TASK_LABELS, load_task_examples
+
+set_seed(42)
+
+# 1️⃣ Config (tasks + labels come from classifiers/tasks.py)
+save_dir = "./classifiers/multitask_model/multitask_classifier"
+
+EPOCHS = 4
+BATCH_SIZE = 16
+LR = 2e-5
+MAX_LENGTH = 128
+
+
+# 2️⃣ Data: 90/10 stratified split per task
+splits = {}
+for task in TASK_LABELS:
+    df = load_task_examples(task)
+    train_df, val_df = train_test_split(df, test_size=0.1, stratify=df["labels"], random_state=42)
+    splits[task] = (train_df, val_df)
+    print(f"{task}: {len(train_df)} train / {len(val_df)} val")
+
+# 3️⃣ Tokenizer + model (shared encoder, one head per task)
+tok = DistilBertTokenizerFast.from_pretrained("distilbert-base-uncased")
+model = MultiTaskDistilBert(DistilBertModel.from_pretrained("distilbert-base-uncased"), TASK_LABELS)
+device = "cuda" if torch.cuda.is_available() else "cpu"
+model.to(device)
+
+
+def batches(df: pd.DataFrame, task: str, shuffle: bool):
+    idx = list(range(len(df)))
+    if shuffle:
+        random.shuffle(idx)
+    for i in range(0, len(idx), BATCH_SIZE):
+        rows = df.iloc[idx[i:i + BATCH_SIZE]]
+        enc = tok(list(rows["text"]), truncation=True, padding=True, max_length=MAX_LENGTH, return_tensors="pt")
+        yield task, enc.to(device), torch.tensor(rows["labels"].values, device=device)
+
+
+# 4️⃣ Training: batches from all three tasks, shuffled together each epoch
+optimizer = torch.optim.AdamW(model.parameters(), lr=LR, weight_decay=0.01)
+loss_fn = torch.nn.CrossEntropyLoss()
+
+for epoch in range(EPOCHS):
+    model.train()
+    epoch_batches = [b for task, (train_df, _) in splits.items() for b in batches(train_df, task, shuffle=True)]
+    random.shuffle(epoch_batches)
+
+    total_loss = 0.0
+    for task, enc, labels in epoch_batches:
+        logits = model(enc["input_ids"], enc["attention_mask"], task=task)
+        loss = loss_fn(logits, labels)
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        total_loss += loss.item()
+
+    # 5️⃣ Per-task accuracy on the held-out split
+    model.eval()
+    accs = {}
+    with torch.no_grad():
+        for task, (_, val_df) in splits.items():
+            correct = 0
+            for _, enc, labels in batches(val_df, task, shuffle=False):
+                preds = model(enc["input_ids"], enc["attention_mask"], task=task).argmax(dim=1)
+                correct += int((preds == labels).sum())
+            accs[task] = round(correct / len(val_df), 4)
+    print(f"epoch {epoch + 1}: loss={total_loss / len(epoch_batches):.4f} val_acc={accs}")
+
+# Save encoder + heads + label map, and the tokenizer next to them
+model.to("cpu")
+model.save_pretrained(save_dir)
+tok.save_pretrained(save_dir)
+print(f"Saved to {save_dir}")
@@ -0,0 +1,95 @@
+# classifiers/onnx_backend.py
+
+"""
+ONNX Runtime backend for the three single-task DistilBERT classifiers.
+
+classifiers/onnx_export.py writes one directory per task:
+
+    <CLASSIFIER_ONNX_DIR>/<task>/model.onnx          fp32 export
+    <CLASSIFIER_ONNX_DIR>/<task>/model.int8.onnx     dynamic int8 quantization
+    <CLASSIFIER_ONNX_DIR>/<task>/labels.json + tokenizer files
+
+Selected with CLASSIFIER_BACKEND=onnx: classifiers/backends.py takes each task's
+get_classifier(task) and dispatches to it. onnxruntime is only needed when this backend
+is used.
+"""
+
+import json
+import os
+import threading
+from typing import List
+
+import numpy as np
+from transformers import DistilBertTokenizerFast
+
+ONNX_DIR = os.getenv("CLASSIFIER_ONNX_DIR", "./classifiers/onnx")
+# "int8" (default) or "fp32"
+ONNX_PRECISION = os.getenv("CLASSIFIER_ONNX_PRECISION", "int8")
+# intra-op threads per session; the turn engine already runs turns in parallel
+ONNX_THREADS = int(os.getenv("CLASSIFIER_ONNX_THREADS", "1"))
+
+
+def model_filename(precision: str) -> str:
+    return "model.int8.onnx" if precision == "int8" else "model.onnx"
+
+
+class OnnxClassifier:
+
+    def __init__(self, task_dir: str, precision: str = ONNX_PRECISION, threads: int = ONNX_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "CLASSIFIER_BACKEND=onnx needs onnxruntime (pip install onnxruntime)"
+            ) from e
+
+        path = os.path.join(task_dir, model_filename(precision))
+        if not os.path.exists(path):
+            raise RuntimeError(
+                f"{path} not found. Export it first: python -m classifiers.onnx_export export"
+            )
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.tokenizer = DistilBertTokenizerFast.from_pretrained(task_dir)
+        with open(os.path.join(task_dir, "labels.json")) as f:
+            self.labels: List[str] = json.load(f)
+
+    def logits(self, texts: List[str]) -> np.ndarray:
+        enc = self.tokenizer(
+            texts,
+            return_tensors="np",
+            truncation=True,
+            padding=True,
+            max_length=128,
+        )
+        return self.session.run(
+            ["logits"],
+            {
+                "input_ids": enc["input_ids"].astype(np.int64),
+                "attention_mask": enc["attention_mask"].astype(np.int64),
+            },
+        )[0]
+
+    def predict(self, text: str) -> str:
+        return self.labels[int(np.argmax(self.logits([text])[0]))]
+
+    def predict_batch(self, texts: List[str]) -> List[str]:
+        return [self.labels[int(i)] for i in np.argmax(self.logits(texts), axis=1)]
+
+
+# task -> OnnxClassifier, created on first use (so the export tool can import this module)
+_classifiers = {}
+_lock = threading.Lock()
+
+
+def get_classifier(task: str) -> OnnxClassifier:
+    clf = _classifiers.get(task)
+    if clf is None:
+        with _lock:
+            clf = _classifiers.get(task)
+            if clf is None:
+                clf = _classifiers[task] = OnnxClassifier(os.path.join(ONNX_DIR, task))
+    return clf
@@ -0,0 +1,179 @@
+# classifiers/onnx_export.py
+
+"""
+Export the DistilBERT classifiers to ONNX, check them against torch, and time them.
+
+Run from the repo root:
+
+    python -m classifiers.onnx_export export            # fp32 + dynamic int8 for every task
+    python -m classifiers.onnx_export parity            # labels vs torch on the training CSVs
+    python -m classifiers.onnx_export bench             # batch-1 latency, torch vs onnx fp32 vs int8
+
+Needs torch, transformers and onnxruntime (the web app itself only needs onnxruntime).
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from app.services.model_bundle import resolve_model  # before transformers: may set HF_HUB_OFFLINE
+
+import torch
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+from classifiers.onnx_backend import ONNX_DIR, OnnxClassifier, model_filename
+from classifiers.tasks import TASK_LABELS, TASK_MODEL_IDS, load_task_examples
+
+LATENCY_REPORT = "./metrics/classifier_latency.csv"
+
+
+def _load_torch(task: str):
+    tok = DistilBertTokenizerFast.from_pretrained(resolve_model(TASK_MODEL_IDS[task]))
+    model = DistilBertForSequenceClassification.from_pretrained(resolve_model(TASK_MODEL_IDS[task])).eval()
+    return tok, model
+
+
+def _torch_predict(tok, model, texts):
+    enc = tok(texts, return_tensors="pt", truncation=True, padding=True, max_length=128)
+    with torch.no_grad():
+        return model(**enc).logits.argmax(dim=1).tolist()
+
+
+# ---------- export ----------
+
+def export_task(task: str, out_dir: str, opset: int = 17) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    task_dir = os.path.join(out_dir, task)
+    os.makedirs(task_dir, exist_ok=True)
+    tok, model = _load_torch(task)
+    model.config.return_dict = False  # plain tuple output traces cleanly
+
+    sample = tok(["sample utterance for tracing"], return_tensors="pt")
+    fp32_path = os.path.join(task_dir, model_filename("fp32"))
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=opset,
+    )
+
+    # weights -> int8, activations quantized on the fly
+    quantize_dynamic(fp32_path, os.path.join(task_dir, model_filename("int8")), weight_type=QuantType.QInt8)
+
+    tok.save_pretrained(task_dir)
+    labels = [model.config.id2label[i] for i in range(model.config.num_labels)]
+    with open(os.path.join(task_dir, "labels.json"), "w") as f:
+        json.dump(labels, f, indent=2)
+
+    sizes = {p: os.path.getsize(os.path.join(task_dir, model_filename(p))) / 1e6 for p in ("fp32", "int8")}
+    print(f"[export] {task}: fp32={sizes['fp32']:.0f}MB int8={sizes['int8']:.0f}MB -> {task_dir}")
+
+
+# ---------- parity ----------
+
+def parity_task(task: str, out_dir: str, precision: str, batch_size: int = 64):
+    # fraction of training utterances where ONNX picks the same label as torch
+    df = load_task_examples(task)
+    texts = df["text"].tolist()
+    tok, model = _load_torch(task)
+    onnx_clf = OnnxClassifier(os.path.join(out_dir, task), precision=precision, threads=os.cpu_count() or 1)
+
+    same = 0
+    mismatches = []
+    for i in range(0, len(texts), batch_size):
+        chunk = texts[i:i + batch_size]
+        torch_ids = _torch_predict(tok, model, chunk)
+        onnx_ids = np.argmax(onnx_clf.logits(chunk), axis=1).tolist()
+        for text, t_id, o_id in zip(chunk, torch_ids, onnx_ids):
+            if t_id == o_id:
+                same += 1
+            else:
+                mismatches.append((text, model.config.id2label[t_id], onnx_clf.labels[o_id]))
+
+    agreement = same / len(texts) if texts else 1.0
+    print(f"[parity] {task} ({precision}): {same}/{len(texts)} labels match ({agreement:.2%})")
+    for text, t_label, o_label in mismatches[:10]:
+        print(f"    {text!r}: torch={t_label} onnx={o_label}")
+    return agreement
+
+
+# ---------- latency ----------
+
+def _timed(fn, texts, warmup: int = 10):
+    for text in texts[:warmup]:
+        fn(text)
+    times = []
+    for text in texts:
+        started = time.perf_counter()
+        fn(text)
+        times.append(1000 * (time.perf_counter() - started))
+    times.sort()
+    return {
+        "p50_ms": round(statistics.median(times), 2),
+        "p95_ms": round(times[int(0.95 * (len(times) - 1))], 2),
+        "mean_ms": round(statistics.fmean(times), 2),
+    }
+
+
+def bench_task(task: str, out_dir: str, n: int, threads: int):
+    texts = load_task_examples(task)["text"].sample(n=n, replace=True, random_state=42).tolist()
+    torch.set_num_threads(threads)
+    tok, model = _load_torch(task)
+
+    rows = [{"task": task, "backend": "torch-fp32", **_timed(lambda t: _torch_predict(tok, model, [t]), texts)}]
+    for precision in ("fp32", "int8"):
+        clf = OnnxClassifier(os.path.join(out_dir, task), precision=precision, threads=threads)
+        rows.append({"task": task, "backend": f"onnx-{precision}", **_timed(clf.predict, texts)})
+
+    for row in rows:
+        print(f"[bench] {row['task']:<13} {row['backend']:<11} p50={row['p50_ms']}ms p95={row['p95_ms']}ms")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "parity", "bench"])
+    parser.add_argument("--tasks", nargs="+", default=list(TASK_LABELS), choices=list(TASK_LABELS))
+    parser.add_argument("--out-dir", default=ONNX_DIR)
+    parser.add_argument("--precision", default="int8", choices=["int8", "fp32"], help="parity: model to check")
+    parser.add_argument("--min-agreement", type=float, default=0.99, help="parity: fail below this")
+    parser.add_argument("-n", type=int, default=300, help="bench: utterances per backend")
+    parser.add_argument("--threads", type=int, default=1, help="bench: intra-op threads")
+    parser.add_argument("--report", default=LATENCY_REPORT, help="bench: CSV output")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for task in args.tasks:
+            export_task(task, args.out_dir)
+
+    elif args.command == "parity":
+        failed = [t for t in args.tasks if parity_task(t, args.out_dir, args.precision) < args.min_agreement]
+        if failed:
+            print(f"[parity] below {args.min_agreement:.0%} agreement: {', '.join(failed)}")
+            sys.exit(1)
+
+    elif args.command == "bench":
+        rows = [row for task in args.tasks for row in bench_task(task, args.out_dir, args.n, args.threads)]
+        os.makedirs(os.path.dirname(args.report), exist_ok=True)
+        with open(args.report, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[bench] report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
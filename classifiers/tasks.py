@@ -0,0 +1,47 @@
+# classifiers/tasks.py
+
+"""
+The three turn-classification tasks in one place: labels (same ids as the trained
+models), the HF checkpoint of each single-task model and the training CSVs.
+
+Used by the export / training / benchmark tools, so they don't have to import the
+classifier modules (which load their models at import).
+"""
+
+import os
+
+import pandas as pd
+
+TASK_LABELS = {
+    "intent": ["APPT_NEW", "APPT_RESCHEDULE", "APPT_CANCEL", "RX_REFILL", "ADMIN_INFO", "OTHER", "HUMAN_AGENT"],
+    "appt_context": ["STAY_APPT", "EXIT_APPT"],
+    "confirmation": ["CONFIRM", "REJECT", "UNSURE"],
+}
+
+# same env overrides as the classifier modules
+TASK_MODEL_IDS = {
+    "intent": os.getenv("INTENT_MODEL_ID", "Exogenesis/clinai-intent-classifier"),
+    "appt_context": os.getenv("APPT_CONTEXT_MODEL_ID", "Exogenesis/clinai-appt-context-classifier"),
+    "confirmation": os.getenv("CONFIRM_MODEL_ID", "Exogenesis/clinai-confirmation-classifier"),
+}
+
+TASK_DATA_DIRS = {
+    "intent": "./data/intent_examples",
+    "appt_context": "./data/appt_context_examples",
+    "confirmation": "./data/confirmation_examples",
+}
+
+
+def load_task_examples(task: str) -> pd.DataFrame:
+    # all CSVs for a task -> deduped (text, label, labels) frame, unknown labels dropped
+    directory_path = TASK_DATA_DIRS[task]
+    labels = TASK_LABELS[task]
+
+    df = pd.concat(
+        [pd.read_csv(os.path.join(directory_path, file)) for file in sorted(os.listdir(directory_path))]
+    )
+    df = df.drop_duplicates().dropna(subset=["text", "label"])
+    df["label"] = df["label"].str.upper().str.strip()
+    df = df[df["label"].isin(labels)].copy()
+    df["labels"] = df["label"].map({l: i for i, l in enumerate(labels)}).astype("int64")
+    return df.reset_index(drop=True)
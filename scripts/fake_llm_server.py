@@ -0,0 +1,196 @@
+# scripts/fake_llm_server.py
+"""
+Local stand-in for the Ollama and OpenAI HTTP APIs, for exercising app/voice/llm.py
+(pooled clients, query_llm / query_llm_async, fallback, circuit breaker) without a GPU
+or an API key.
+
+    python -m scripts.fake_llm_server --port 11500 --delay-ms 300
+
+    OLLAMA_HOST=http://127.0.0.1:11500 \\
+    OPENAI_BASE_URL=http://127.0.0.1:11500/v1 OPENAI_API_KEY=fake \\
+    uvicorn app.clinai_web:app
+
+Serves GET /api/tags, POST /api/chat (Ollama) and POST /v1/chat/completions (OpenAI),
+streaming and not. The reply echoes the last user message. --fail-ollama makes
+/api/chat return 500 (to trip the circuit breaker) while /api/tags keeps answering.
+Each log line carries the number of TCP connections accepted so far, so keep-alive
+reuse (or the lack of it) is visible.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_lock = threading.Lock()
+_connections = 0
+
+
+def _reply_text(messages) -> str:
+    last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"You said: {last_user}" if last_user else "Hello from the fake LLM server."
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real servers
+    delay_s = 0.0
+    token_delay_s = 0.0
+    fail_ollama = False
+
+    def setup(self):
+        global _connections
+        super().setup()
+        with _lock:
+            _connections += 1
+
+    def log_message(self, fmt, *args):
+        print(f"[fake-llm] conn#{_connections} {self.command} {self.path} {fmt % args}")
+
+    # ---------- helpers ----------
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _tokens(self, text: str):
+        # word-sized pieces, like a real model's stream
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.token_delay_s:
+                time.sleep(self.token_delay_s)
+            yield word if i == 0 else " " + word
+
+    # ---------- routes ----------
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "llama3.1:8b", "model": "llama3.1:8b", "size": 0}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        body = self._body()
+        time.sleep(self.delay_s)
+        if self.path == "/api/chat":
+            self._ollama_chat(body)
+        elif self.path == "/v1/chat/completions":
+            self._openai_chat(body)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _ollama_chat(self, body: dict) -> None:
+        if self.fail_ollama:
+            self._send_json({"error": "model failed to load"}, status=500)
+            return
+        model = body.get("model", "llama3.1:8b")
+        text = _reply_text(body.get("messages", []))
+        prompt_tokens = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+        done = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "done_reason": "stop",
+            "load_duration": 0,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": prompt_tokens * 100_000,  # 0.1ms per token, all "uncached"
+            "eval_count": len(text.split()),
+        }
+
+        if not body.get("stream", True):  # Ollama streams unless told otherwise
+            self._send_json({**done, "message": {"role": "assistant", "content": text}})
+            return
+
+        self._start_chunked("application/x-ndjson")
+        for piece in self._tokens(text):
+            line = {"model": model, "message": {"role": "assistant", "content": piece}, "done": False}
+            self._chunk(json.dumps(line).encode() + b"\n")
+        self._chunk(json.dumps({**done, "message": {"role": "assistant", "content": ""}}).encode() + b"\n")
+        self._end_chunked()
+
+    def _openai_chat(self, body: dict) -> None:
+        model = body.get("model", "gpt-4o-mini")
+        text = _reply_text(body.get("messages", []))
+        created = int(time.time())
+
+        if not body.get("stream"):
+            self._send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(text.split()), "total_tokens": 0},
+            })
+            return
+
+        self._start_chunked("text/event-stream")
+        for piece in self._tokens(text):
+            event = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            self._chunk(f"data: {json.dumps(event)}\n\n".encode())
+        final = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        self._chunk(f"data: {json.dumps(final)}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="latency before each chat response")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="gap between streamed tokens")
+    parser.add_argument("--fail-ollama", action="store_true", help="/api/chat returns 500")
+    args = parser.parse_args()
+
+    FakeLLMHandler.delay_s = args.delay_ms / 1000
+    FakeLLMHandler.token_delay_s = args.token_delay_ms / 1000
+    FakeLLMHandler.fail_ollama = args.fail_ollama
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeLLMHandler)
+    print(f"[fake-llm] serving Ollama + OpenAI APIs on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from app.voice.llm_health import CLOSED, HALF_OPEN, OPEN, OllamaHealth
+
+def make_health(**kwargs) -> OllamaHealth:
+    health = OllamaHealth(lambda: None, **kwargs)
+    health.start()  # first probe succeeds: reachable
+    health.stop()
+    return health
+
+async def cancelled_call(health: OllamaHealth) -> None:
+    async def call():
+        with health.tracked():
+            await asyncio.sleep(10)
+
+    task = asyncio.ensure_future(call())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+# cancelled calls are not failures: the circuit stays closed
+health = make_health(failure_threshold=1)
+for _ in range(3):
+    asyncio.run(cancelled_call(health))
+print(health.stats())
+assert health._failures == 0 and health._state == CLOSED
+
+# an error is
+try:
+    with health.tracked():
+        raise RuntimeError("chat failed")
+except RuntimeError:
+    pass
+assert health._failures == 1 and health._state == OPEN
+
+# a cancelled half-open trial hands the trial on without re-opening for open_s
+health = make_health(failure_threshold=1, open_s=0.05)
+health.record_failure()
+time.sleep(0.06)
+assert health.available() and health._state == HALF_OPEN
+asyncio.run(cancelled_call(health))
+assert health._failures == 1 and health.available()
+with health.tracked():
+    pass
+assert health._state == CLOSED and health._failures == 0
+
+print("ok")
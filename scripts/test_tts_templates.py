@@ -0,0 +1,30 @@
+import os
+
+os.environ["TTS_TEMPLATE_MODE"] = "true"  # read at import
+
+from app.voice.tts_templates import template_prewarm_texts
+from app.voice.web_tts import EDGE_TTS_VOICE, plan_tts
+
+def pieces(text: str):
+    return [piece for piece, _ in plan_tts([(text, EDGE_TTS_VOICE)])]
+
+# greeting: same split whatever the name's length, and the name rides with "Hi"
+for name in ["Bob", "Christopher", "Maximilian-Alexander"]:
+    got = pieces(f"Hi {name}, I'm Ava. How can I assist you today?")
+    print(got)
+    assert got == [f"Hi {name},", "I'm Ava. How can I assist you today?"], got
+
+# the fixed piece is the one that gets prewarmed
+assert "I'm Ava. How can I assist you today?" in template_prewarm_texts({})
+
+# a template next to ordinary sentences
+got = pieces("Sorry, I didn't catch your answer. Would you like a refill for Lisinopril?")
+print(got)
+assert got == ["Sorry, I didn't catch your answer.", "Would you like a refill for", "Lisinopril?"], got
+
+# no template: plain sentence split (short ones merged into the next)
+got = pieces("Perfect! Your appointment is booked. See you then.")
+print(got)
+assert got == ["Perfect! Your appointment is booked.", "See you then."], got
+
+print("ok")